@@ -1,32 +1,221 @@
-from flask_openapi3 import OpenAPI, Info, Tag
-from flask import redirect
+from flask_openapi3 import OpenAPI, APIBlueprint, Info, Tag
+from flask import redirect, request, make_response, Response, stream_with_context, g, has_request_context
 from urllib.parse import unquote
-
+from collections import Counter
+from functools import lru_cache
+import click
+import json
+import os
+import time
+
+from sqlalchemy import and_, bindparam, event, func, literal, or_, select
 from sqlalchemy.exc import IntegrityError
-
-from model import Session, Tema, Item
-from logger import logger
+from sqlalchemy.orm import selectinload
+
+from model import Session, Tema, Item, Versao, engine, busca_itens, inicializa_base
+from logger import logger, configura_logs
+from cache import cache_temas, cache_ids_temas, cache_paginas
+from serializacao import CodificadorJSON, codifica, resposta_json
+from limites import admissao, cabecalho_chave
+import metricas
 from schemas import *
 from flask_cors import CORS
 
+# perfil de comandos SQL por requisição, opcional e configurado por variáveis
+# de ambiente: com PERFIL_SQL=1, as requisições que excederem a quantidade de
+# comandos ou a duração (ms) definidas são registradas no log com seus
+# comandos SQL; com PERFIL_SERVER_TIMING=1, as respostas trazem o cabeçalho
+# Server-Timing com a duração total e a gasta em SQL
+perfil_sql = os.environ.get("PERFIL_SQL", "0") == "1"
+perfil_max_consultas = int(os.environ.get("PERFIL_MAX_CONSULTAS", 10))
+perfil_max_duracao_ms = float(os.environ.get("PERFIL_MAX_DURACAO_MS", 200))
+perfil_server_timing = os.environ.get("PERFIL_SERVER_TIMING", "0") == "1"
+
 info = Info(title="Tema & Itens API", version="1.0.0")
-app = OpenAPI(__name__, info=info)
-CORS(app)
+# rotas da API, registradas no app por create_app
+api = APIBlueprint("api", __name__)
 
 # definindo tags
 home_tag = Tag(name="Documentação", description="Documentação Swagger")
 tema_tag = Tag(name="Tema", description="Adição, visualização, atualização e remoção de temas à base")
 item_tag = Tag(name="Item", description="Adição, visualização, atualização e remoção de um item a um tema cadastrado na base")
+monitor_tag = Tag(name="Monitoramento", description="Estatísticas de funcionamento da API")
+
+# métricas do pool de conexões e dos caches, lidas a cada exportação
+for nome, descricao, leitura, tipo in [
+        ("db_pool_size", "Conexões mantidas no pool.", lambda: engine.pool.size(), "gauge"),
+        ("db_pool_checked_out", "Conexões do pool em uso.", lambda: engine.pool.checkedout(), "gauge"),
+        ("db_pool_checked_in", "Conexões livres no pool.", lambda: engine.pool.checkedin(), "gauge"),
+        ("db_pool_overflow", "Conexões abertas além do tamanho do pool.", lambda: engine.pool.overflow(), "gauge"),
+        ("db_pool_checkouts_total", "Conexões obtidas do pool.",
+         lambda: engine.pool.estatisticas.checkouts, "counter"),
+        ("db_pool_timeouts_total", "Esperas por conexão encerradas por timeout.",
+         lambda: engine.pool.estatisticas.timeouts, "counter"),
+        ("db_pool_wait_seconds_total", "Tempo total de espera por conexões.",
+         lambda: engine.pool.estatisticas.espera_total, "counter"),
+        ("cache_temas_hits_total", "Acertos do cache de temas.", lambda: cache_temas.acertos, "counter"),
+        ("cache_temas_misses_total", "Falhas do cache de temas.", lambda: cache_temas.falhas, "counter"),
+        ("cache_ids_temas_hits_total", "Acertos do cache de ids de temas.", lambda: cache_ids_temas.acertos, "counter"),
+        ("cache_ids_temas_misses_total", "Falhas do cache de ids de temas.", lambda: cache_ids_temas.falhas, "counter"),
+        ("cache_paginas_hits_total", "Acertos do cache de páginas.", lambda: cache_paginas.acertos, "counter"),
+        ("cache_paginas_misses_total", "Falhas do cache de páginas.", lambda: cache_paginas.falhas, "counter")]:
+    metricas.registro.registra(metricas.Medidor(nome, descricao, leitura, tipo))
+
+
+@api.teardown_app_request
+def remove_session(exception=None):
+    """Encerra a sessão com o banco usada pela requisição, devolvendo sua
+    conexão ao pool.
+    """
+    Session.remove()
+
+
+@api.before_app_request
+def inicia_medicao():
+    """Inicia a medição de duração e de comandos SQL da requisição.
+    """
+    g.inicio_requisicao = time.perf_counter()
+    g.consultas_sql = 0
+    g.tempo_sql = 0.0
+    g.comandos_sql = []
+
+
+@api.before_app_request
+def controla_admissao():
+    """Recusa a requisição, sem enfileirá-la, se o cliente excedeu o limite de
+    taxa da rota (429) ou se não há vaga para mais requisições simultâneas (503).
+    """
+    rota = request.url_rule.rule if request.url_rule else "desconhecida"
+    chave_rota = "%s %s" % (request.method, rota)
+    cliente = admissao.identifica_cliente(request.headers.get(cabecalho_chave), request.remote_addr)
+
+    espera = admissao.limita_taxa(cliente, chave_rota)
+    if espera:
+        metricas.requisicoes_recusadas.incrementa(rota, "taxa")
+        return _resposta_recusada("Limite de requisições excedido, tente novamente em %d s" % espera,
+                                  429, espera)
+
+    vagas = admissao.admite(chave_rota)
+    if vagas is None:
+        metricas.requisicoes_recusadas.incrementa(rota, "concorrencia")
+        return _resposta_recusada("Servidor ocupado, tente novamente em instantes", 503, 1)
+    g.vagas_admissao = vagas
+
+
+@api.teardown_app_request
+def libera_admissao(exception=None):
+    """Devolve as vagas de requisições simultâneas ocupadas pela requisição.
+    """
+    admissao.libera(g.pop("vagas_admissao", []))
+
+
+def _resposta_recusada(mensagem: str, status: int, espera: int):
+    """Retorna a resposta de uma requisição recusada, com o cabeçalho Retry-After.
+    """
+    response = resposta_json(codifica({"message": mensagem}), status)
+    response.headers["Retry-After"] = str(espera)
+    return response
+
+
+@api.after_app_request
+def registra_medicao(response):
+    """Registra nas métricas a duração, o status e os comandos SQL da requisição.
+    """
+    if "inicio_requisicao" in g:
+        duracao = time.perf_counter() - g.inicio_requisicao
+        rota = request.url_rule.rule if request.url_rule else "desconhecida"
+        metricas.requisicoes.incrementa(rota, request.method, response.status_code)
+        metricas.duracao_requisicoes.observa(rota, request.method, valor=duracao)
+        metricas.consultas_requisicao.observa(rota, valor=g.consultas_sql)
+        metricas.tempo_sql_requisicao.observa(rota, valor=g.tempo_sql)
+
+        if perfil_sql and (g.consultas_sql > perfil_max_consultas
+                           or duracao * 1000 > perfil_max_duracao_ms):
+            logger.warning("Requisição %s %s acima do limite: %d comandos SQL, %.1f ms (%.1f ms em SQL)\n%s",
+                           request.method, request.full_path, g.consultas_sql,
+                           duracao * 1000, g.tempo_sql * 1000,
+                           "\n".join("  %.2f ms: %s" % (ms, comando) for comando, ms in g.comandos_sql))
+
+        if perfil_server_timing:
+            response.headers["Server-Timing"] = 'db;dur=%.2f;desc="%d comandos SQL", total;dur=%.2f' % (
+                g.tempo_sql * 1000, g.consultas_sql, duracao * 1000)
+    return response
+
+
+@click.command("inicializa-base")
+def inicializa_base_comando():
+    """Cria o banco, caso não exista, e aplica as migrações pendentes do esquema."""
+    inicializa_base()
+    logger.info("Base inicializada")
+
+
+@click.command("verifica-total-itens")
+@click.option("--corrige", is_flag=True, help="Recalcula a quantidade de itens dos temas divergentes.")
+def verifica_total_itens_comando(corrige):
+    """Compara a quantidade de itens mantida em cada tema com a contagem dos seus itens."""
+    session = Session()
+    divergentes = Tema.total_itens_divergentes(session)
+    for nome, total_itens, contagem in divergentes:
+        logger.warning("Tema '%s' com total_itens %d e %d itens", nome, total_itens, contagem)
+    if divergentes and corrige:
+        Versao.avanca(session)
+        Tema.recalcula_total_itens(session)
+        session.commit()
+    logger.info("%d temas divergentes%s", len(divergentes), " corrigidos" if divergentes and corrige else "")
+    Session.remove()
+    if divergentes and not corrige:
+        raise SystemExit(1)
+
+
+def create_app():
+    """Cria o app da API, com as rotas, o CORS e o serializador JSON, e
+    configura os logs.
+
+    A importação deste módulo não faz I/O: os logs são configurados aqui, e o
+    banco é criado pelo comando `flask inicializa-base`, executado uma única
+    vez antes de iniciar a API.
+    """
+    configura_logs()
+    app = OpenAPI(__name__, info=info)
+    # serializa as respostas pelo orjson (quando disponível), mantendo a ordem
+    # das chaves das representações
+    app.json_encoder = CodificadorJSON
+    app.config["JSON_SORT_KEYS"] = False
+    app.register_api(api)
+    app.cli.add_command(inicializa_base_comando)
+    app.cli.add_command(verifica_total_itens_comando)
+    CORS(app)
+    return app
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def inicia_comando_sql(conn, cursor, statement, parameters, context, executemany):
+    """Marca o início de um comando SQL no seu contexto de execução, descartado
+    com o comando, inclusive quando ele falha e after_cursor_execute não ocorre.
+    """
+    context._inicio_comando = time.perf_counter()
+
+
+@event.listens_for(engine, "after_cursor_execute")
+def finaliza_comando_sql(conn, cursor, statement, parameters, context, executemany):
+    """Soma a duração do comando SQL à requisição em andamento.
+    """
+    duracao = time.perf_counter() - context._inicio_comando
+    if has_request_context() and "consultas_sql" in g:
+        g.consultas_sql += 1
+        g.tempo_sql += duracao
+        if perfil_sql:
+            g.comandos_sql.append((statement, duracao * 1000))
 
 
-@app.get('/', tags=[home_tag])
+@api.get('/', tags=[home_tag])
 def home():
     """Redireciona para /openapi/swagger, tela que permite ver a documentação em Swagger.
     """
     return redirect('/openapi/swagger')
 
 
-@app.post('/tema', tags=[tema_tag],
+@api.post('/tema', tags=[tema_tag],
           responses={"200": TemaViewSchema, "409": ErrorSchema, "400": ErrorSchema})
 def add_tema(form: TemaSchema):
     """Adiciona um novo Tema à base de dados
@@ -35,31 +224,38 @@ def add_tema(form: TemaSchema):
     """
     nome = form.nome
     tema = Tema(nome)
-    logger.debug(f"Adicionando tema de nome: '{tema.nome}'")
+    logger.debug("Adicionando tema de nome: '%s'", tema.nome)
+    # o tema é novo, então sua representação (sem itens) não requer consultas
+    tema_view = apresenta_tema(tema)
     try:
         # criando conexão com a base
         session = Session()
-        # adicionando tema
+        # adicionando tema com um único INSERT, que grava a nova versão da
+        # base; a duplicidade do nome é verificada pela restrição de
+        # unicidade (IntegrityError)
+        Versao.avanca(session)
+        tema.versao = Versao.valor_sql()
         session.add(tema)
         # efetivando o camando de adição de novo item na tabela
         session.commit()
-        logger.debug(f"Adicionado tema de nome: '{tema.nome}'")
-        return apresenta_tema(tema), 200
+        cache_temas.invalida(nome)
+        logger.debug("Adicionado tema de nome: '%s'", nome)
+        return tema_view, 200
 
     except IntegrityError as e:
         # como a duplicidade do nome é a provável razão do IntegrityError
         error_msg = "Tema de mesmo nome já salvo na base :/"
-        logger.warning(f"Erro ao adicionar tema '{tema.nome}', {error_msg}")
+        logger.warning("Erro ao adicionar tema '%s', %s", tema.nome, error_msg)
         return {"message": error_msg}, 409
 
     except Exception as e:
         # caso um erro fora do previsto
         error_msg = "Não foi possível salvar novo item :/"
-        logger.warning(f"Erro ao adicionar tema '{tema.nome}', {error_msg}")
+        logger.warning("Erro ao adicionar tema '%s', %s", tema.nome, error_msg)
         return {"message": error_msg}, 400
 
 
-@app.put('/tema', tags=[tema_tag],
+@api.put('/tema', tags=[tema_tag],
           responses={"200": TemaViewSchema, "409": ErrorSchema, "400": ErrorSchema, "404": ErrorSchema})
 def update_tema(form: TemaUpdSchema):
     """Atualiza o nome de um Tema à base de dados
@@ -69,63 +265,368 @@ def update_tema(form: TemaUpdSchema):
     nome_velho = form.nome_velho
     nome_novo = form.nome_novo
 
-    logger.debug(f"Atualizando tema de nome: de '{nome_velho}' para '{nome_novo}'")
+    logger.debug("Atualizando tema de nome: de '%s' para '%s'", nome_velho, nome_novo)
     try:
         # criando conexão com a base
         session = Session()
-        # buscando tema
-        tema = session.query(Tema).filter(Tema.nome == nome_velho).first()
-        tema_renomeado = session.query(Tema).filter(Tema.nome == nome_novo).first()
+        # renomeando o tema com um único UPDATE condicional ao nome antigo;
+        # a duplicidade do novo nome é verificada pela restrição de
+        # unicidade (IntegrityError)
+        Versao.avanca(session)
+        count = session.query(Tema).filter(Tema.nome == nome_velho) \
+            .update({Tema.nome: nome_novo, Tema.versao: Versao.valor_sql()}, synchronize_session=False)
 
-        if not tema:
+        if not count:
             # se o tema não foi encontrado
+            session.rollback()
             error_msg = "Tema não encontrado na base :/"
-            logger.warning(f"Erro ao buscar tema '{nome_velho}', {error_msg}")
+            logger.warning("Erro ao buscar tema '%s', %s", nome_velho, error_msg)
             return {"message": error_msg}, 404
-        elif tema_renomeado:
-            # erro de duplicidade do nome
-            error_msg = "Tema de mesmo nome já salvo na base :/"
-            logger.warning(f"Erro ao atualizar tema '{tema.nome}', {error_msg}")
-            return {"message": error_msg}, 409
-        else:
-            # atualiza o nome do tema
-            tema.atualiza_nome_tema(nome_novo)
-            
-            # efetivando o camando de atualização do tema na tabela
-            session.commit()
-            logger.debug(f"Atualizado tema de nome: de '{nome_velho}' para '{nome_novo}'")
-            return apresenta_tema(tema), 200
+
+        # efetivando o camando de atualização do tema na tabela
+        session.commit()
+        cache_temas.invalida(nome_velho, nome_novo)
+        cache_ids_temas.invalida(nome_velho, nome_novo)
+        logger.debug("Atualizado tema de nome: de '%s' para '%s'", nome_velho, nome_novo)
+
+    except IntegrityError as e:
+        # erro de duplicidade do nome
+        error_msg = "Tema de mesmo nome já salvo na base :/"
+        logger.warning("Erro ao atualizar tema '%s', %s", nome_velho, error_msg)
+        return {"message": error_msg}, 409
 
     except Exception as e:
         # caso um erro fora do previsto
         error_msg = "Não foi possível salvar novo item :/"
-        logger.warning(f"Erro ao adicionar tema '{tema.nome}', {error_msg}")
+        logger.warning("Erro ao adicionar tema '%s', %s", nome_velho, error_msg)
         return {"message": error_msg}, 400
 
+    return _resposta_tema_view(session, nome_novo)
+
 
-@app.get('/temas', tags=[tema_tag],
+@api.get('/temas', tags=[tema_tag],
          responses={"200": ListagemTemasSchema, "404": ErrorSchema})
-def get_temas():
-    """Faz a busca por todos os Temas cadastrados
+def get_temas(query: TemasBuscaSchema):
+    """Faz a busca paginada pelos Temas cadastrados
 
-    Retorna uma representação da listagem de temas.
+    Retorna uma representação da listagem de temas e o cursor da próxima página.
     """
-    logger.debug(f"Coletando temas ")
+    logger.debug("Coletando temas ")
     # criando conexão com a base
     session = Session()
-    # fazendo a busca
-    temas = session.query(Tema).all()
+    versao = Versao.atual(session)
+    return _resposta_com_etag(versao, lambda: _pagina_codificada(
+        ("temas", query.cursor, query.limit, query.resumo), versao, lambda: _lista_temas(session, query)))
+
+
+# quantidade de temas cujos primeiros itens são lidos em cada consulta da
+# listagem de temas (uma página completa, com o limite máximo)
+TAMANHO_LOTE_ITENS_TEMAS = 1000
+
+
+def _lista_temas(session, query: TemasBuscaSchema):
+    """ Retorna a representação de uma página da listagem de temas.
+    """
+    # fazendo a busca por keyset: temas com pk_tema após o cursor, com um
+    # registro a mais para saber se existe próxima página. Apenas as colunas
+    # de tema são lidas; fora do modo resumo, os primeiros itens dos temas da
+    # página são lidos em seguida (ver _primeiros_itens).
+    busca = session.query(Tema.id, Tema.nome, Tema.total_itens)
+    if query.cursor is not None:
+        busca = busca.filter(Tema.id > query.cursor)
+    temas = busca.order_by(Tema.id).limit(query.limit + 1).all()
+
+    next_cursor = None
+    if len(temas) > query.limit:
+        temas = temas[:query.limit]
+        next_cursor = temas[-1].id
+
+    logger.debug("%d temas econtrados", len(temas))
+    # retorna a representação de temas
+    if query.resumo:
+        return apresenta_resumo_temas(temas, next_cursor)
+    itens_temas = _primeiros_itens(session, [tema.id for tema in temas], LIMITE_ITENS_LISTAGEM + 1)
+    return apresenta_temas(temas, itens_temas, next_cursor)
+
+
+def _primeiros_itens(session, ids_temas: list, limite: int):
+    """ Retorna um dicionário com os primeiros itens (em ordem de id), até
+        limite, de cada tema de chave informada.
+
+    Os itens de vários temas são lidos em uma única consulta, que numera os
+    itens de cada tema pelo índice (tema, id) e mantém os limite primeiros.
+    A consulta tem a mesma forma para qualquer quantidade de temas (lista IN
+    expandida na execução), e é compilada uma única vez pelo SQLAlchemy.
+    """
+    posicao = func.row_number().over(partition_by=Item.tema, order_by=Item.id).label("posicao")
+    numerados = select(Item.id, Item.tema, Item.nome, posicao) \
+        .where(Item.tema.in_(bindparam("ids_temas", expanding=True))).subquery()
+    consulta = select(numerados.c.id, numerados.c.tema, numerados.c.nome) \
+        .where(numerados.c.posicao <= bindparam("limite")) \
+        .order_by(numerados.c.tema, numerados.c.id)
+
+    # executada na conexão da sessão, sem o processamento de resultados do
+    # ORM, desnecessário para linhas de colunas
+    conexao = session.connection()
+    itens_temas = {}
+    for ids in _em_lotes(ids_temas, TAMANHO_LOTE_ITENS_TEMAS):
+        for item in conexao.execute(consulta, {"ids_temas": ids, "limite": limite}):
+            itens_temas.setdefault(item.tema, []).append(item)
+    return itens_temas
+
+
+@api.get('/temas/export', tags=[tema_tag])
+def export_temas():
+    """Exporta todos os Temas cadastrados e seus Itens
+
+    Retorna um tema por linha no formato NDJSON (application/x-ndjson), enviado
+    à medida que é lido da base.
+    """
+    logger.debug("Exportando temas ")
+
+    def gera_linhas():
+        # criando conexão com a base
+        session = Session()
+        try:
+            # uma única consulta ordenada por tema, lida em lotes do cursor
+            # da base, para que a memória não cresça com o tamanho dos dados
+            linhas = session.query(Tema.id, Tema.nome, Item.nome) \
+                .outerjoin(Item, Item.tema == Tema.id) \
+                .order_by(Tema.id, Item.id) \
+                .execution_options(stream_results=True) \
+                .yield_per(1000)
+
+            tema_atual, nome_tema, itens = None, None, []
+            for id_tema, nome, nome_item in linhas:
+                if id_tema != tema_atual:
+                    if tema_atual is not None:
+                        yield _linha_export(nome_tema, itens)
+                    tema_atual, nome_tema, itens = id_tema, nome, []
+                if nome_item is not None:
+                    itens.append({"nome": nome_item})
+
+            if tema_atual is not None:
+                yield _linha_export(nome_tema, itens)
+        finally:
+            session.close()
+
+    return Response(stream_with_context(gera_linhas()), mimetype="application/x-ndjson")
+
+
+def _linha_export(nome_tema: str, itens: list):
+    """ Retorna a linha NDJSON de um tema exportado.
+    """
+    tema = {"nome": nome_tema, "total_itens": len(itens), "itens": itens}
+    return codifica(tema) + b"\n"
+
+
+# quantidade de registros importados por transação
+TAMANHO_LOTE_IMPORTACAO = 500
+# quantidade de valores usados em cada cláusula IN durante a importação
+TAMANHO_LOTE_BUSCA = 500
+# tentativas de importar um lote em conflito com escritas concorrentes
+TENTATIVAS_IMPORTACAO = 3
+
+
+@api.post('/temas/import', tags=[tema_tag],
+          responses={"200": ImportacaoViewSchema, "400": ErrorSchema})
+def import_temas():
+    """Importa Temas e Itens em lote
+
+    Recebe um array JSON ou NDJSON (um registro por linha). Cada registro é um
+    novo tema, no formato da exportação ({"nome": ..., "itens": [{"nome": ...}]}),
+    ou um novo item de um tema ({"nome_tema": ..., "nome_item": ...}).
 
-    if not temas:
-        # se não há temas cadastrados
-        return {"temas": []}, 200
+    Retorna a quantidade de temas e itens inseridos e os registros em conflito.
+    """
+    try:
+        registros = _le_registros_importacao(request.get_data(as_text=True))
+    except ValueError as e:
+        error_msg = "Registros de importação inválidos :/"
+        logger.warning("Erro ao importar temas, %s (%s)", error_msg, e)
+        return {"message": error_msg}, 400
+
+    logger.debug("Importando %d registros", len(registros))
+    # criando conexão com a base
+    session = Session()
+    resultado = {"temas": 0, "itens": 0, "conflitos": []}
+    for inicio in range(0, len(registros), TAMANHO_LOTE_IMPORTACAO):
+        lote = registros[inicio:inicio + TAMANHO_LOTE_IMPORTACAO]
+        for _ in range(TENTATIVAS_IMPORTACAO):
+            try:
+                parcial = _importa_lote(session, lote, inicio)
+                break
+            except IntegrityError:
+                # um tema ou item do lote foi inserido por outra requisição
+                # após a verificação de duplicidade; a nova tentativa o verá
+                # como conflito
+                session.rollback()
+        else:
+            # as tentativas se esgotaram: o lote inteiro é informado como
+            # conflito, sem desfazer os lotes já efetivados
+            logger.warning("Erro ao importar lote a partir do registro %d, %d tentativas em conflito",
+                           inicio, TENTATIVAS_IMPORTACAO)
+            parcial = {"temas": 0, "itens": 0, "conflitos": [
+                {"registro": registro, "nome_tema": nome_tema,
+                 "message": "Lote em conflito com outras escritas, importe o registro novamente :/"}
+                for registro, (nome_tema, _, _) in enumerate(lote, inicio)]}
+        resultado["temas"] += parcial["temas"]
+        resultado["itens"] += parcial["itens"]
+        resultado["conflitos"].extend(parcial["conflitos"])
+        cache_temas.invalida(*{nome_tema for nome_tema, _, _ in lote})
+
+    logger.debug("Importados %d temas e %d itens", resultado["temas"], resultado["itens"])
+    return resultado, 200
+
+
+def _le_registros_importacao(corpo: str):
+    """ Converte o corpo da importação em uma lista de (nome_tema, itens, novo),
+        onde novo indica que o registro cria o tema.
+
+        Lança ValueError se o corpo ou algum registro for inválido.
+    """
+    corpo = corpo.strip()
+    if corpo.startswith("["):
+        brutos = json.loads(corpo)
     else:
-        logger.debug(f"%d temas econtrados" % len(temas))
-        # retorna a representação de tema
-        return apresenta_temas(temas), 200
+        brutos = [json.loads(linha) for linha in corpo.splitlines() if linha.strip()]
+
+    registros = []
+    for i, bruto in enumerate(brutos):
+        if isinstance(bruto, dict) and isinstance(bruto.get("nome"), str):
+            itens = bruto.get("itens", [])
+            if not isinstance(itens, list) or \
+                    not all(isinstance(c, dict) and isinstance(c.get("nome"), str) for c in itens):
+                raise ValueError(f"registro {i}: itens inválidos")
+            registros.append((bruto["nome"], [c["nome"] for c in itens], True))
+        elif isinstance(bruto, dict) and isinstance(bruto.get("nome_tema"), str) \
+                and isinstance(bruto.get("nome_item"), str):
+            registros.append((bruto["nome_tema"], [bruto["nome_item"]], False))
+        else:
+            raise ValueError(f"registro {i}: formato não reconhecido")
+    return registros
+
+
+def _importa_lote(session, lote: list, inicio: int):
+    """ Insere um lote de registros de importação em uma única transação.
 
+    Retorna a quantidade de temas e itens inseridos e os registros em conflito.
+    """
+    conflitos = []
+    # a transação começa pela versão da base, como todas as escritas
+    versao = Versao.incrementa(session)
+
+    # busca de uma vez os temas do lote já cadastrados
+    nomes_temas = list({nome_tema for nome_tema, _, _ in lote})
+    ids_temas = {}
+    for nomes in _em_lotes(nomes_temas, TAMANHO_LOTE_BUSCA):
+        ids_temas.update(session.query(Tema.nome, Tema.id).filter(Tema.nome.in_(nomes)))
+
+    # separa os temas novos, descartando os de nome já usado; os nomes dos
+    # temas novos ficam em um dicionário, conjunto que mantém a ordem dos
+    # registros (e dos ids criados) com verificação de pertinência em O(1)
+    novos_temas = {}
+    aceitos = []
+    for registro, (nome_tema, itens, novo) in enumerate(lote, inicio):
+        if novo and (nome_tema in ids_temas or nome_tema in novos_temas):
+            conflitos.append({"registro": registro, "nome_tema": nome_tema,
+                              "message": "Tema de mesmo nome já salvo na base :/"})
+        elif not novo and nome_tema not in ids_temas and nome_tema not in novos_temas:
+            conflitos.append({"registro": registro, "nome_tema": nome_tema,
+                              "nome_item": itens[0],
+                              "message": "Tema não encontrado na base :/"})
+        else:
+            if novo:
+                novos_temas[nome_tema] = None
+            aceitos.append((registro, nome_tema, itens))
+
+    if not aceitos:
+        # nada a inserir: desfaz o incremento da versão
+        session.rollback()
+        return {"temas": 0, "itens": 0, "conflitos": conflitos}
+
+    if novos_temas:
+        nomes_novos = list(novos_temas)
+        session.execute(Tema.__table__.insert(),
+                        [{"nome": nome, "versao": versao} for nome in nomes_novos])
+        for nomes in _em_lotes(nomes_novos, TAMANHO_LOTE_BUSCA):
+            ids_temas.update(session.query(Tema.nome, Tema.id).filter(Tema.nome.in_(nomes)))
+
+    # busca os itens do lote já cadastrados nos temas, agrupando os nomes por
+    # tema: cada consulta verifica até TAMANHO_LOTE_BUSCA nomes, com um
+    # critério (tema = ? AND nome IN (...)) por tema, atendido pelo índice da
+    # restrição de unicidade; temas criados neste lote ainda não têm itens
+    nomes_por_tema = {}
+    for registro, nome_tema, itens in aceitos:
+        if nome_tema not in novos_temas:
+            nomes_por_tema.setdefault(ids_temas[nome_tema], set()).update(itens)
+    pares = [(id_tema, nome_item) for id_tema, nomes in nomes_por_tema.items() for nome_item in nomes]
+    existentes = set()
+    for parte in _em_lotes(pares, TAMANHO_LOTE_BUSCA):
+        grupos = {}
+        for id_tema, nome_item in parte:
+            grupos.setdefault(id_tema, []).append(nome_item)
+        parametros = {}
+        for i, (id_tema, nomes) in enumerate(grupos.items()):
+            parametros["tema_%d" % i] = id_tema
+            parametros["nomes_%d" % i] = nomes
+        existentes.update(session.execute(_consulta_itens_existentes(len(grupos)), parametros))
+
+    # descarta os itens de mesmo nome no tema
+    novos_itens = []
+    for registro, nome_tema, itens in aceitos:
+        for nome_item in itens:
+            chave = (ids_temas[nome_tema], nome_item)
+            if chave in existentes:
+                conflitos.append({"registro": registro, "nome_tema": nome_tema,
+                                  "nome_item": nome_item,
+                                  "message": "Item de mesmo nome já salvo na base :/"})
+            else:
+                existentes.add(chave)
+                novos_itens.append({"tema": chave[0], "nome": nome_item})
+
+    if novos_itens:
+        session.execute(Item.__table__.insert(), novos_itens)
+        # atualiza a versão e a quantidade de itens dos temas alterados, com
+        # um único UPDATE executado para cada tema (executemany)
+        quantidades = Counter(item["tema"] for item in novos_itens)
+        tabela = Tema.__table__
+        session.execute(tabela.update()
+                        .where(tabela.c.pk_tema == bindparam("id_tema"))
+                        .values(versao=versao, total_itens=tabela.c.total_itens + bindparam("quantidade")),
+                        [{"id_tema": id_tema, "quantidade": quantidade}
+                         for id_tema, quantidade in quantidades.items()])
+
+    # efetivando as inserções do lote
+    session.commit()
+    return {"temas": len(novos_temas), "itens": len(novos_itens), "conflitos": conflitos}
 
-@app.get('/tema', tags=[tema_tag],
+
+@lru_cache(maxsize=None)
+def _consulta_itens_existentes(quantidade_temas: int):
+    """ Retorna a consulta dos itens cadastrados com os nomes informados em
+        cada um de quantidade_temas temas: (tema = :tema_0 AND nome IN
+        :nomes_0) OR (tema = :tema_1 ...), atendida pelo índice da restrição
+        de unicidade.
+
+    A consulta é montada uma única vez para cada quantidade de temas e recebe
+    os temas e as listas de nomes como parâmetros.
+    """
+    colunas = Item.__table__.c
+    return select(colunas.tema, colunas.nome).where(or_(
+        *(and_(colunas.tema == bindparam("tema_%d" % i),
+               colunas.nome.in_(bindparam("nomes_%d" % i, expanding=True)))
+          for i in range(quantidade_temas))))
+
+
+def _em_lotes(valores: list, tamanho: int):
+    """ Divide uma lista em partes de até tamanho elementos.
+    """
+    for inicio in range(0, len(valores), tamanho):
+        yield valores[inicio:inicio + tamanho]
+
+
+@api.get('/tema', tags=[tema_tag],
          responses={"200": TemaViewSchema, "404": ErrorSchema})
 def get_tema(query: TemaBuscaSchema):
     """Faz a busca por um Tema a partir do nome do tema
@@ -133,7 +634,15 @@ def get_tema(query: TemaBuscaSchema):
     Retorna uma representação do tema e itens associados.
     """
     nome_tema = unquote(unquote(query.nome))
-    logger.debug(f"Coletando dados sobre tema #{nome_tema}")
+    logger.debug("Coletando dados sobre tema #%s", nome_tema)
+    # buscando a representação do tema no cache
+    tema_cache = cache_temas.busca(nome_tema)
+    if tema_cache is not None:
+        logger.debug("Tema econtrado no cache: '%s'", nome_tema)
+        versao, corpo = tema_cache
+        return _resposta_com_etag(versao, lambda: resposta_json(corpo))
+
+    versao_cache = cache_temas.versao
     # criando conexão com a base
     session = Session()
     # fazendo a busca
@@ -142,15 +651,61 @@ def get_tema(query: TemaBuscaSchema):
     if not tema:
         # se o tema não foi encontrado
         error_msg = "Tema não encontrado na base :/"
-        logger.warning(f"Erro ao buscar tema '{nome_tema}', {error_msg}")
+        logger.warning("Erro ao buscar tema '%s', %s", nome_tema, error_msg)
         return {"message": error_msg}, 404
     else:
-        logger.debug(f"Tema econtrado: '{tema.nome}'")
-        # retorna a representação de tema
-        return apresenta_tema(tema), 200
+        logger.debug("Tema econtrado: '%s'", tema.nome)
+
+        def gera_tema_view():
+            # gera a representação de tema, guardando-a serializada no cache
+            corpo = codifica(apresenta_tema(tema))
+            cache_temas.guarda(nome_tema, (tema.versao, corpo), versao_cache)
+            return resposta_json(corpo)
+
+        return _resposta_com_etag(tema.versao, gera_tema_view)
 
 
-@app.delete('/tema', tags=[tema_tag],
+@api.get('/temas/lote', tags=[tema_tag],
+         responses={"200": TemasLoteViewSchema, "422": ErrorSchema})
+def get_temas_lote(query: TemasLoteSchema):
+    """Faz a busca de vários Temas a partir dos nomes, em uma única requisição
+
+    Retorna as representações dos temas encontrados, na ordem pedida, e os
+    nomes não encontrados.
+    """
+    # remove nomes repetidos, mantendo a ordem pedida
+    nomes = list(dict.fromkeys(unquote(unquote(nome)) for nome in query.nomes))
+    logger.debug("Coletando dados sobre %d temas", len(nomes))
+
+    # buscando no cache as representações (já serializadas) conhecidas
+    temas_view = {}
+    for nome_tema in nomes:
+        tema_cache = cache_temas.busca(nome_tema)
+        if tema_cache is not None:
+            temas_view[nome_tema] = tema_cache[1]
+
+    faltantes = [nome_tema for nome_tema in nomes if nome_tema not in temas_view]
+    if faltantes:
+        versao_cache = cache_temas.versao
+        # criando conexão com a base
+        session = Session()
+        # busca os temas em uma única consulta IN, carregando os itens de
+        # todos eles em uma única consulta adicional
+        temas = session.query(Tema).options(selectinload(Tema.itens)) \
+            .filter(Tema.nome.in_(faltantes)).all()
+        for tema in temas:
+            corpo = codifica(apresenta_tema(tema))
+            cache_temas.guarda(tema.nome, (tema.versao, corpo), versao_cache)
+            temas_view[tema.nome] = corpo
+
+    logger.debug("%d de %d temas econtrados", len(temas_view), len(nomes))
+    # monta a resposta juntando as representações já serializadas
+    temas = b",".join(temas_view[nome_tema] for nome_tema in nomes if nome_tema in temas_view)
+    nao_encontrados = codifica([nome_tema for nome_tema in nomes if nome_tema not in temas_view])
+    return resposta_json(b'{"temas":[' + temas + b'],"nao_encontrados":' + nao_encontrados + b"}")
+
+
+@api.delete('/tema', tags=[tema_tag],
             responses={"200": TemaDelSchema, "404": ErrorSchema})
 def del_tema(form: TemaBuscaSchema):
     """Deleta um Tema a partir do nome de tema informado
@@ -158,25 +713,31 @@ def del_tema(form: TemaBuscaSchema):
     Retorna uma mensagem de confirmação da remoção.
     """
     nome_tema = form.nome
-    logger.debug(f"Deletando dados sobre tema #{nome_tema}")
+    logger.debug("Deletando dados sobre tema #%s", nome_tema)
     # criando conexão com a base
     session = Session()
-    # fazendo a remoção
+    # fazendo a remoção do tema e de seus itens, na mesma transação, que
+    # começa pela versão da base, como todas as escritas
+    Versao.avanca(session)
+    _remove_itens_dos_temas(session, Tema.nome == nome_tema)
     count = session.query(Tema).filter(Tema.nome == nome_tema).delete()
-    session.commit()
 
-    if count:
-        # retorna a representação da mensagem de confirmação
-        logger.debug(f"Deletado tema #{nome_tema}")
-        return {"message": "Tema removido", "nome": nome_tema}, 200
-    else:
+    if not count:
         # se o tema não foi encontrado
+        session.rollback()
         error_msg = "Tema não encontrado na base :/"
-        logger.warning(f"Erro ao deletar tema #'{nome_tema}', {error_msg}")
+        logger.warning("Erro ao deletar tema #'%s', %s", nome_tema, error_msg)
         return {"message": error_msg}, 404
+
+    session.commit()
+    cache_temas.invalida(nome_tema)
+    cache_ids_temas.invalida(nome_tema)
+    # retorna a representação da mensagem de confirmação
+    logger.debug("Deletado tema #%s", nome_tema)
+    return {"message": "Tema removido", "nome": nome_tema}, 200
     
 
-@app.delete('/temas', tags=[tema_tag],
+@api.delete('/temas', tags=[tema_tag],
             responses={"200": TemasDelSchema, "404": ErrorSchema})
 def del_temas():
     """Deleta todos os Temas cadastrados
@@ -185,24 +746,63 @@ def del_temas():
     """
     # criando conexão com a base
     session = Session()
-    # fazendo a remoção
+    # fazendo a remoção de todos os itens e temas, na mesma transação
+    Versao.avanca(session)
+    session.query(Item).delete()
     count = session.query(Tema).delete()
-    session.commit()
 
-    if count:
-        # retorna a representação da mensagem de confirmação
-        logger.debug(f"Deletado todos os temas")
-        return {"message": "Temas removidos", "quantidade": count}, 200
-    else:
-        # se o tema não foi encontrado
+    if not count:
+        # se não há temas
+        session.rollback()
         error_msg = "Não há temas para deletar :/"
-        logger.warning(f"Erro ao deletar temas', {error_msg}")
+        logger.warning("Erro ao deletar temas', %s", error_msg)
+        return {"message": error_msg}, 404
+
+    session.commit()
+    cache_temas.limpa()
+    cache_ids_temas.limpa()
+    # retorna a representação da mensagem de confirmação
+    logger.debug("Deletado todos os temas")
+    return {"message": "Temas removidos", "quantidade": count}, 200
+
+
+@api.delete('/temas/lote', tags=[tema_tag],
+            responses={"200": TemasLoteDelSchema, "404": ErrorSchema, "422": ErrorSchema})
+def del_temas_lote(form: TemasLoteSchema):
+    """Deleta vários Temas, e seus itens, a partir dos nomes informados
+
+    Retorna a quantidade de temas e itens removidos e os nomes não encontrados.
+    """
+    nomes = list(dict.fromkeys(form.nomes))
+    logger.debug("Deletando %d temas", len(nomes))
+    # criando conexão com a base
+    session = Session()
+    # fazendo a remoção dos itens e dos temas com um DELETE para cada tabela,
+    # na mesma transação
+    Versao.avanca(session)
+    count_itens = _remove_itens_dos_temas(session, Tema.nome.in_(nomes))
+    encontrados = {nome for nome, in session.query(Tema.nome).filter(Tema.nome.in_(nomes))}
+    count = session.query(Tema).filter(Tema.nome.in_(nomes)).delete(synchronize_session=False)
+
+    if not count:
+        # se nenhum tema foi encontrado
+        session.rollback()
+        error_msg = "Temas não encontrados na base :/"
+        logger.warning("Erro ao deletar temas em lote, %s", error_msg)
         return {"message": error_msg}, 404
 
+    session.commit()
+    cache_temas.invalida(*nomes)
+    cache_ids_temas.invalida(*nomes)
+    # retorna a representação da mensagem de confirmação
+    logger.debug("Deletados %d temas e %d itens", count, count_itens)
+    return {"message": "Temas removidos", "quantidade": count, "quantidade_itens": count_itens,
+            "nao_encontrados": [nome for nome in nomes if nome not in encontrados]}, 200
+
 
 
 
-@app.post('/item', tags=[item_tag],
+@api.post('/item', tags=[item_tag],
           responses={"200": TemaViewSchema, "409": ErrorSchema, "400": ErrorSchema, "404": ErrorSchema})
 def add_item(form: ItemSchema):
     """Adiciona um novo Item à base de dados
@@ -212,40 +812,46 @@ def add_item(form: ItemSchema):
     nome_tema = form.nome_tema
     nome_item = form.nome_item
     
-    logger.debug(f"Adicionando tema de nome: '{nome_item}'")
+    logger.debug("Adicionando tema de nome: '%s'", nome_item)
     try:
         # criando conexão com a base
         session = Session()
-        # buscando tema
-        tema = session.query(Tema).filter(Tema.nome == nome_tema).first()
+        # adicionando o item com um único INSERT ... SELECT, que só insere se
+        # o tema existir; a duplicidade do nome do item no tema é verificada
+        # pela restrição de unicidade (IntegrityError)
+        Versao.avanca(session)
+        count = session.execute(Item.__table__.insert().from_select(
+            ["nome", "tema"], select(literal(nome_item), Tema.id).where(Tema.nome == nome_tema))).rowcount
 
-        if not tema:
+        if not count:
             # se o tema não foi encontrado
+            session.rollback()
             error_msg = "Tema não encontrado na base :/"
-            logger.warning(f"Erro ao adicionar item no tema #'{nome_tema}', {error_msg}")
+            logger.warning("Erro ao adicionar item no tema #'%s', %s", nome_tema, error_msg)
             return {"message": error_msg}, 404
-        
-        item = Item(nome_item)
-        count = tema.adiciona_item(item)
-        if not count:
-            # duplicidade de nome de item no tema
-            error_msg = "Item de mesmo nome já salvo na base :/"
-            logger.warning(f"Erro ao adicionar item '{nome_item}', {error_msg}")
-            return {"message": error_msg}, 409
-        
+
+        _registra_alteracao_tema(session, nome_tema, 1)
         # efetivando o camando de adição de novo item na tabela
         session.commit()
-        logger.debug(f"Adicionado item '{nome_item}' no tema '{nome_tema}'")
-        return apresenta_tema(tema), 200
-    
+        cache_temas.invalida(nome_tema)
+        logger.debug("Adicionado item '%s' no tema '%s'", nome_item, nome_tema)
+
+    except IntegrityError as e:
+        # duplicidade de nome de item no tema
+        error_msg = "Item de mesmo nome já salvo na base :/"
+        logger.warning("Erro ao adicionar item '%s', %s", nome_item, error_msg)
+        return {"message": error_msg}, 409
+
     except Exception as e:
         # caso um erro fora do previsto
         error_msg = "Não foi possível salvar novo item :/"
-        logger.warning(f"Erro ao adicionar item '{nome_item}', {error_msg}")
+        logger.warning("Erro ao adicionar item '%s', %s", nome_item, error_msg)
         return {"message": error_msg}, 400
 
+    return _resposta_tema_view(session, nome_tema)
+
 
-@app.put('/item', tags=[item_tag],
+@api.put('/item', tags=[item_tag],
           responses={"200": TemaViewSchema, "409": ErrorSchema, "400": ErrorSchema, "404": ErrorSchema})
 def update_item(form: ItemUpdSchema):
     """Atualiza o nome de um item à base de dados
@@ -256,76 +862,123 @@ def update_item(form: ItemUpdSchema):
     nome_item_novo = form.nome_item_novo
     nome_tema = form.nome_tema
 
-    logger.debug(f"Atualizado item de nome: de '{nome_item_velho}' para '{nome_item_novo}' no tema '{nome_tema}'")
+    logger.debug("Atualizado item de nome: de '%s' para '%s' no tema '%s'", nome_item_velho, nome_item_novo, nome_tema)
     try:
         # criando conexão com a base
         session = Session()
-        # buscando tema
-        tema = session.query(Tema).filter(Tema.nome == nome_tema).first()
+        # renomeando o item com um único UPDATE condicional ao tema e ao nome
+        # antigo; a duplicidade do novo nome no tema é verificada pela
+        # restrição de unicidade (IntegrityError)
+        Versao.avanca(session)
+        count = session.query(Item).filter(Item.tema == _id_tema_sql(nome_tema), Item.nome == nome_item_velho) \
+            .update({Item.nome: nome_item_novo}, synchronize_session=False)
 
-        if not tema:
-            # se o tema não foi encontrado
-            error_msg = "Tema não encontrado na base :/"
-            logger.warning(f"Erro ao buscar tema '{nome_tema}', {error_msg}")
-            return {"message": error_msg}, 404
-        
-        # buscando item
-        item = session.query(Item).filter(Item.nome == nome_item_velho, Item.tema == tema.id).first()
-        
-        if not item:
-            # se o item não foi encontrado
-            error_msg = "Item não encontrado na base :/"
-            logger.warning(f"Erro ao buscar item '{nome_item_velho}', {error_msg}")
+        if not count:
+            session.rollback()
+            if _tema_ausente(session, nome_tema):
+                # se o tema não foi encontrado
+                error_msg = "Tema não encontrado na base :/"
+                logger.warning("Erro ao buscar tema '%s', %s", nome_tema, error_msg)
+            else:
+                # se o item não foi encontrado
+                error_msg = "Item não encontrado na base :/"
+                logger.warning("Erro ao buscar item '%s', %s", nome_item_velho, error_msg)
             return {"message": error_msg}, 404
-        
-        # atualiza o nome do tema
-        count = tema.atualiza_nome_item(nome_item_velho, nome_item_novo)
+
+        _registra_alteracao_tema(session, nome_tema)
         session.commit()
+        cache_temas.invalida(nome_tema)
+        logger.debug("Atualizado item de nome: de '%s' para '%s' no tema '%s'", nome_item_velho, nome_item_novo, nome_tema)
 
-        if count:
-            logger.debug(f"Atualizado item de nome: de '{nome_item_velho}' para '{nome_item_novo}' no tema '{nome_tema}'")
-            return apresenta_tema(tema), 200
-        else:
-            # erro de duplicidade do nome
-            error_msg = "Item de mesmo nome já salvo na base :/"
-            logger.warning(f"Erro ao atualizar item '{nome_item_velho}', {error_msg}")
-            return {"message": error_msg}, 409
+    except IntegrityError as e:
+        # erro de duplicidade do nome
+        error_msg = "Item de mesmo nome já salvo na base :/"
+        logger.warning("Erro ao atualizar item '%s', %s", nome_item_velho, error_msg)
+        return {"message": error_msg}, 409
 
     except Exception as e:
         # caso um erro fora do previsto
         error_msg = "Não foi possível salvar novo item :/"
-        logger.warning(f"Erro ao adicionar tema '{tema.nome}', {error_msg}")
+        logger.warning("Erro ao adicionar tema '%s', %s", nome_tema, error_msg)
         return {"message": error_msg}, 400
 
+    return _resposta_tema_view(session, nome_tema)
+
 
-@app.get('/itens', tags=[item_tag],
+@api.get('/itens', tags=[item_tag],
          responses={"200": TemaViewSchema, "404": ErrorSchema})
-def get_itens(query: ItensBuscaSchema):
-    """Faz a busca por todos os Itens cadastrados em um tema
+def get_itens(query: ItensListagemSchema):
+    """Faz a busca paginada pelos Itens cadastrados em um tema
 
-    Retorna uma representação do tema e itens associados.
+    Retorna uma representação do tema, uma página de itens associados e o
+    cursor da próxima página.
     """
-    logger.debug(f"Coletando itens ")
+    logger.debug("Coletando itens ")
 
     nome_tema = unquote(unquote(query.nome_tema))
 
     # criando conexão com a base
     session = Session()
     # fazendo a busca do tema
-    tema = session.query(Tema).filter(Tema.nome == nome_tema).first()
+    tema = session.query(Tema.id, Tema.versao, Tema.total_itens).filter(Tema.nome == nome_tema).first()
 
     if not tema:
          # se o tema não foi encontrado
         error_msg = "Tema não encontrado na base :/"
-        logger.warning(f"Erro ao buscar tema '{nome_tema}', {error_msg}")
+        logger.warning("Erro ao buscar tema '%s', %s", nome_tema, error_msg)
         return {"message": error_msg}, 404
-    else:
-        logger.debug(f"%d itens econtrados" % len(tema.itens))
-        # retorna a representação de tema
-        return apresenta_tema(tema), 200
+
+    return _resposta_com_etag(tema.versao, lambda: _pagina_codificada(
+        ("itens", tema.id, query.cursor, query.limit), tema.versao,
+        lambda: _lista_itens(session, nome_tema, tema.id, tema.total_itens, query)))
 
 
-@app.get('/item', tags=[item_tag],
+def _lista_itens(session, nome_tema: str, id_tema: int, total_itens: int, query: ItensListagemSchema):
+    """ Retorna a representação de uma página dos itens de um tema.
+    """
+    # fazendo a busca por keyset dos itens do tema após o cursor, com um
+    # registro a mais para saber se existe próxima página
+    busca = session.query(Item).filter(Item.tema == id_tema)
+    if query.cursor is not None:
+        busca = busca.filter(Item.id > query.cursor)
+    itens = busca.order_by(Item.id).limit(query.limit + 1).all()
+
+    next_cursor = None
+    if len(itens) > query.limit:
+        itens = itens[:query.limit]
+        next_cursor = itens[-1].id
+
+    logger.debug("%d itens econtrados", len(itens))
+    # retorna a representação de tema
+    return apresenta_pagina_itens(nome_tema, itens, total_itens, next_cursor)
+
+
+@api.get('/itens/busca', tags=[item_tag],
+         responses={"200": BuscaViewSchema})
+def search_itens(query: BuscaSchema):
+    """Faz a busca textual por Itens de todos os temas, pelo nome do item ou do tema
+
+    Retorna uma página dos itens encontrados, ordenados por relevância, e o
+    cursor da próxima página.
+    """
+    busca = unquote(unquote(query.q))
+    posicao = query.cursor or 0
+    logger.debug("Buscando itens por '%s'", busca)
+    # criando conexão com a base
+    session = Session()
+    # fazendo a busca, com um registro a mais para saber se existe próxima página
+    resultados = busca_itens(session, busca, query.limit + 1, posicao)
+
+    next_cursor = None
+    if len(resultados) > query.limit:
+        resultados = resultados[:query.limit]
+        next_cursor = posicao + query.limit
+
+    logger.debug("%d itens econtrados", len(resultados))
+    return apresenta_busca(resultados, next_cursor), 200
+
+
+@api.get('/item', tags=[item_tag],
          responses={"200": ItemViewSchema, "404": ErrorSchema})
 def get_item(query: ItemBuscaSchema):
     """Faz a busca por um Item a partir do nome do tema + item
@@ -335,32 +988,32 @@ def get_item(query: ItemBuscaSchema):
     nome_tema = unquote(unquote(query.nome_tema))
     nome_item = unquote(unquote(query.nome_item))
 
-    logger.debug(f"Coletando dados sobre item #{nome_item} no tema #{nome_tema}")
+    logger.debug("Coletando dados sobre item #%s no tema #%s", nome_item, nome_tema)
     # criando conexão com a base
     session = Session()
     # fazendo a busca
-    tema = session.query(Tema).filter(Tema.nome == nome_tema).first()
+    id_tema = _busca_id_tema(session, nome_tema)
 
-    if not tema:
+    if id_tema is None:
         # se o tema não foi encontrado
         error_msg = "Tema não encontrado na base :/"
-        logger.warning(f"Erro ao buscar tema '{nome_tema}', {error_msg}")
+        logger.warning("Erro ao buscar tema '%s', %s", nome_tema, error_msg)
         return {"message": error_msg}, 404
     else:
-        item = session.query(Item).filter(Item.nome == nome_item, Item.tema == tema.id).first()
+        item = session.query(Item).filter(Item.nome == nome_item, Item.tema == id_tema).first()
 
         if not item:
             # se o tema não foi encontrado
             error_msg = "Item não encontrado na base :/"
-            logger.warning(f"Erro ao buscar item '{nome_item}', {error_msg}")
+            logger.warning("Erro ao buscar item '%s', %s", nome_item, error_msg)
             return {"message": error_msg}, 404
         else:
-            logger.debug(f"Item econtrado: '{nome_item}'")
+            logger.debug("Item econtrado: '%s'", nome_item)
             # retorna a representação de item
-            return apresenta_item(item, tema), 200
+            return apresenta_item(item, nome_tema), 200
 
 
-@app.delete('/item', tags=[item_tag],
+@api.delete('/item', tags=[item_tag],
             responses={"200": ItemDelSchema, "404": ErrorSchema})
 def del_item(form: ItemBuscaSchema):
     """Deleta um Item a partir do nome de tema + item informados
@@ -369,33 +1022,36 @@ def del_item(form: ItemBuscaSchema):
     """
     nome_tema = form.nome_tema
     nome_item = form.nome_item
-    logger.debug(f"Deletando dados sobre item #{nome_item} no tema #{nome_tema}")
+    logger.debug("Deletando dados sobre item #%s no tema #%s", nome_item, nome_tema)
     # criando conexão com a base
     session = Session()
-
-    tema = session.query(Tema).filter(Tema.nome == nome_tema).first()
-
-    if not tema:
-        # se o tema não foi encontrado
-        error_msg = "Tema não encontrado na base :/"
-        logger.warning(f"Erro ao buscar tema '{nome_tema}', {error_msg}")
+    # fazendo a remoção com o tema resolvido pelo nome no próprio DELETE (e
+    # não pelo cache de ids, que pode estar desatualizado)
+    Versao.avanca(session)
+    count = session.query(Item).filter(Item.nome == nome_item, Item.tema == _id_tema_sql(nome_tema)) \
+        .delete(synchronize_session=False)
+
+    if not count:
+        session.rollback()
+        if _tema_ausente(session, nome_tema):
+            # se o tema não foi encontrado
+            error_msg = "Tema não encontrado na base :/"
+            logger.warning("Erro ao buscar tema '%s', %s", nome_tema, error_msg)
+        else:
+            # se o item não foi encontrado
+            error_msg = "Item não encontrado na base :/"
+            logger.warning("Erro ao deletar item #'%s', %s", nome_item, error_msg)
         return {"message": error_msg}, 404
-    
-    count = session.query(Item).filter(Item.nome == nome_item, Item.tema == tema.id).delete()
-    session.commit()
 
-    if count:
-        # retorna a representação da mensagem de confirmação
-        logger.debug(f"Deletado item #{nome_item}")
-        return {"message": "Item removido", "nome": nome_item}, 200
-    else:
-        # se o tema não foi encontrado
-        error_msg = "Item não encontrado na base :/"
-        logger.warning(f"Erro ao deletar item #'{nome_item}', {error_msg}")
-        return {"message": error_msg}, 404
+    _registra_alteracao_tema(session, nome_tema, -count)
+    session.commit()
+    cache_temas.invalida(nome_tema)
+    # retorna a representação da mensagem de confirmação
+    logger.debug("Deletado item #%s", nome_item)
+    return {"message": "Item removido", "nome": nome_item}, 200
     
 
-@app.delete('/itens', tags=[item_tag],
+@api.delete('/itens', tags=[item_tag],
             responses={"200": ItensDelSchema, "404": ErrorSchema})
 def del_itens(form: ItensBuscaSchema):
     """Deleta todos os Itens cadastrados em um tema
@@ -406,25 +1062,192 @@ def del_itens(form: ItensBuscaSchema):
 
     # criando conexão com a base
     session = Session()
+    # fazendo a remoção com o tema resolvido pelo nome no próprio DELETE
+    Versao.avanca(session)
+    count = session.query(Item).filter(Item.tema == _id_tema_sql(nome_tema)) \
+        .delete(synchronize_session=False)
+
+    if not count:
+        session.rollback()
+        if _tema_ausente(session, nome_tema):
+            # se o tema não foi encontrado
+            error_msg = "Tema não encontrado na base :/"
+            logger.warning("Erro ao buscar tema '%s', %s", nome_tema, error_msg)
+        else:
+            # se o tema não tem itens
+            error_msg = "Não há itens para deletar :/"
+            logger.warning("Erro ao deletar itens', %s", error_msg)
+        return {"message": error_msg}, 404
 
-    tema = session.query(Tema).filter(Tema.nome == nome_tema).first()
+    _registra_alteracao_tema(session, nome_tema, -count)
+    session.commit()
+    cache_temas.invalida(nome_tema)
+    # retorna a representação da mensagem de confirmação
+    logger.debug("Deletado todos os itens")
+    return {"message": "Itens removidos", "quantidade": count}, 200
 
-    if not tema:
-        # se o tema não foi encontrado
-        error_msg = "Tema não encontrado na base :/"
-        logger.warning(f"Erro ao buscar tema '{nome_tema}', {error_msg}")
+
+@api.delete('/itens/lote', tags=[item_tag],
+            responses={"200": ItensLoteDelSchema, "404": ErrorSchema, "422": ErrorSchema})
+def del_itens_lote(form: ItensLoteSchema):
+    """Deleta vários Itens de um tema a partir dos nomes informados
+
+    Retorna a quantidade de itens removidos e os nomes não encontrados.
+    """
+    nome_tema = form.nome_tema
+    nomes = list(dict.fromkeys(form.nomes))
+    logger.debug("Deletando %d itens no tema #%s", len(nomes), nome_tema)
+    # criando conexão com a base
+    session = Session()
+    # fazendo a remoção com um único DELETE, com o tema resolvido pelo nome
+    # nos próprios comandos
+    Versao.avanca(session)
+    filtro = (Item.tema == _id_tema_sql(nome_tema), Item.nome.in_(nomes))
+    encontrados = {nome for nome, in session.query(Item.nome).filter(*filtro)}
+    count = session.query(Item).filter(*filtro).delete(synchronize_session=False)
+
+    if not count:
+        session.rollback()
+        if _tema_ausente(session, nome_tema):
+            # se o tema não foi encontrado
+            error_msg = "Tema não encontrado na base :/"
+            logger.warning("Erro ao buscar tema '%s', %s", nome_tema, error_msg)
+        else:
+            # se nenhum item foi encontrado
+            error_msg = "Itens não encontrados na base :/"
+            logger.warning("Erro ao deletar itens em lote no tema '%s', %s", nome_tema, error_msg)
         return {"message": error_msg}, 404
-    
-    # fazendo a remoção
-    count = session.query(Item).filter(Item.tema == tema.id).delete()
+
+    _registra_alteracao_tema(session, nome_tema, -count)
     session.commit()
+    cache_temas.invalida(nome_tema)
+    # retorna a representação da mensagem de confirmação
+    logger.debug("Deletados %d itens no tema #%s", count, nome_tema)
+    return {"message": "Itens removidos", "quantidade": count,
+            "nao_encontrados": [nome for nome in nomes if nome not in encontrados]}, 200
 
-    if count:
-        # retorna a representação da mensagem de confirmação
-        logger.debug(f"Deletado todos os itens")
-        return {"message": "Itens removidos", "quantidade": count}, 200
-    else:
-        # se o tema não foi encontrado
-        error_msg = "Não há itens para deletar :/"
-        logger.warning(f"Erro ao deletar itens', {error_msg}")
+
+@api.get('/cache', tags=[monitor_tag],
+         responses={"200": CacheViewSchema})
+def get_cache():
+    """Faz a busca pelas estatísticas dos caches de temas deste processo
+
+    Retorna os acertos, falhas, entradas e bytes ocupados de cada cache.
+    """
+    return apresenta_cache(cache_temas, cache_ids_temas, cache_paginas), 200
+
+
+@api.get('/pool', tags=[monitor_tag],
+         responses={"200": PoolViewSchema})
+def get_pool():
+    """Faz a busca pelas estatísticas do pool de conexões deste processo
+
+    Retorna a ocupação do pool e o tempo de espera por conexões.
+    """
+    return apresenta_pool(engine.pool), 200
+
+
+@api.get('/metrics', tags=[monitor_tag])
+def get_metrics():
+    """Faz a busca pelas métricas deste processo no formato do Prometheus
+
+    Retorna contagem, status e latência das requisições por rota, comandos SQL
+    por requisição e estatísticas do pool de conexões e dos caches, com o
+    rótulo pid do worker que as mantém.
+    """
+    return Response(metricas.registro.exporta(), mimetype="text/plain; version=0.0.4")
+
+
+def _busca_id_tema(session, nome_tema: str):
+    """ Retorna a chave primária do tema de nome informado, ou None se o tema
+        não estiver cadastrado, consultando antes o cache.
+
+    Como o cache é do processo e pode estar desatualizado (ex.: tema renomeado
+    por outro processo), é usado apenas nas leituras; as escritas resolvem o
+    tema pelo nome no próprio comando (ver _id_tema_sql).
+    """
+    id_tema = cache_ids_temas.busca(nome_tema)
+    if id_tema is None:
+        versao_cache = cache_ids_temas.versao
+        id_tema = session.query(Tema.id).filter(Tema.nome == nome_tema).scalar()
+        if id_tema is not None:
+            cache_ids_temas.guarda(nome_tema, id_tema, versao_cache)
+    return id_tema
+
+
+def _remove_itens_dos_temas(session, *criterios):
+    """ Remove, com um único DELETE, os itens dos temas que atendem aos
+        critérios informados, retornando a quantidade de itens removidos.
+    """
+    ids_temas = select(Tema.id).where(*criterios)
+    return session.query(Item).filter(Item.tema.in_(ids_temas)) \
+        .delete(synchronize_session=False)
+
+
+def _id_tema_sql(nome_tema: str):
+    """ Retorna a subconsulta SQL com a chave primária do tema de nome
+        informado, para resolver o tema dentro do próprio comando de escrita
+    """
+    return select(Tema.id).where(Tema.nome == nome_tema).scalar_subquery()
+
+
+def _tema_ausente(session, nome_tema: str):
+    """ Retorna True se não há tema cadastrado com o nome informado
+    """
+    return session.query(Tema.id).filter(Tema.nome == nome_tema).scalar() is None
+
+
+def _registra_alteracao_tema(session, nome_tema: str, variacao_itens: int = 0):
+    """ Atribui a versão da base, já incrementada na transação por
+        Versao.avanca, ao tema de nome informado, somando variacao_itens à sua
+        quantidade de itens.
+    """
+    session.query(Tema).filter(Tema.nome == nome_tema) \
+        .update({Tema.versao: Versao.valor_sql(), Tema.total_itens: Tema.total_itens + variacao_itens},
+                synchronize_session=False)
+
+
+def _resposta_tema_view(session, nome_tema: str):
+    """ Retorna a representação do tema de nome informado, carregando seus
+        itens em uma única consulta adicional, ou 404 se o tema não existe.
+
+    Usada após efetivar as escritas, para que a leitura dos itens não ocorra
+    com a base bloqueada pela transação de escrita.
+    """
+    tema = session.query(Tema).options(selectinload(Tema.itens)) \
+        .filter(Tema.nome == nome_tema).first()
+    if tema is None:
+        # se o tema foi removido por outra requisição após a escrita
+        error_msg = "Tema não encontrado na base :/"
+        logger.warning("Erro ao buscar tema '%s', %s", nome_tema, error_msg)
         return {"message": error_msg}, 404
+    return apresenta_tema(tema), 200
+
+
+def _pagina_codificada(chave: tuple, versao: int, gera_pagina):
+    """ Retorna a resposta com a página de listagem da chave informada, usando
+        a página já serializada no cache se ela for da versão informada ou,
+        caso contrário, serializando e guardando a produzida por gera_pagina.
+    """
+    pagina_cache = cache_paginas.busca(chave)
+    if pagina_cache is not None and pagina_cache[0] == versao:
+        return resposta_json(pagina_cache[1])
+
+    versao_cache = cache_paginas.versao
+    corpo = codifica(gera_pagina())
+    cache_paginas.guarda(chave, (versao, corpo), versao_cache)
+    return resposta_json(corpo)
+
+
+def _resposta_com_etag(versao: int, gera_corpo):
+    """ Retorna 304 se o cliente já possui a versão informada (If-None-Match)
+        ou, caso contrário, a representação produzida por gera_corpo, sempre
+        com o ETag correspondente à versão.
+    """
+    etag = "v%d" % versao
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = make_response(gera_corpo(), 200)
+    response.set_etag(etag)
+    return response
@@ -0,0 +1,265 @@
+"""Benchmark das rotas da API.
+
+Popula uma base SQLite própria com temas e itens, executa cada rota de app.py
+pelo cliente de testes do Flask (modo "cliente") e/ou por HTTP contra um
+servidor gunicorn iniciado pelo script (modo "servidor"), e grava em JSON a
+vazão e as latências p50/p95/p99 de cada rota.
+
+Exemplo, a partir do diretório raiz do projeto:
+
+    (env)$ python benchmark/bench.py --temas 1000 --itens 20 --requisicoes 500
+"""
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark das rotas da API de temas e itens")
+    parser.add_argument("--temas", type=int, default=200, help="temas criados na base antes das medições")
+    parser.add_argument("--itens", type=int, default=20, help="itens por tema criados na base")
+    parser.add_argument("--requisicoes", type=int, default=200, help="requisições por rota")
+    parser.add_argument("--concorrencia", type=int, default=4, help="requisições simultâneas")
+    parser.add_argument("--modo", choices=["cliente", "servidor", "ambos"], default="ambos",
+                        help="cliente de testes do Flask, servidor gunicorn ou ambos")
+    parser.add_argument("--url", default=None,
+                        help="host:porta de um servidor já em execução, em vez de iniciar um gunicorn; "
+                             "ele deve usar a base informada em --database-url")
+    parser.add_argument("--database-url", default=None,
+                        help="base usada no benchmark, cujas tabelas são recriadas "
+                             "(padrão: SQLite em um diretório temporário)")
+    parser.add_argument("--workers", type=int, default=2, help="workers do gunicorn iniciado")
+    parser.add_argument("--saida", default="bench_output.json", help="arquivo JSON de resultados")
+    return parser.parse_args()
+
+
+# as requisições de cada rota, em ordem de execução: (nome, método, caminho,
+# função que recebe o índice da requisição e retorna os parâmetros, ou o corpo
+# NDJSON no caso da importação). As rotas de escrita criam, renomeiam e
+# removem registros próprios do benchmark; só DELETE /itens/lote e DELETE
+# /itens, medidas após as leituras, removem itens populados, e DELETE /temas,
+# medida por último, remove toda a base. A rota / (redirecionamento) e as da
+# documentação (/openapi) não são medidas.
+def cenarios(args):
+    tema = lambda i: "tema-%d" % (i % args.temas)
+    item = lambda i: "item-%d" % (i % args.itens)
+    # cada importação cria 10 temas com 5 itens
+    importacao = lambda i: "\n".join(
+        json.dumps({"nome": "importado-%d-%d" % (i, j), "itens": [{"nome": "item-%d" % k} for k in range(5)]})
+        for j in range(10))
+    return [
+        ("POST /tema", "POST", "/tema", lambda i: {"nome": "bench-%d" % i}),
+        ("PUT /tema", "PUT", "/tema", lambda i: {"nome_velho": "bench-%d" % i, "nome_novo": "bench-renomeado-%d" % i}),
+        ("GET /tema", "GET", "/tema", lambda i: {"nome": tema(i)}),
+        ("GET /temas", "GET", "/temas", lambda i: {"limit": 100}),
+        ("GET /temas/lote", "GET", "/temas/lote", lambda i: {"nomes": [tema(i + j) for j in range(10)]}),
+        ("GET /temas/export", "GET", "/temas/export", lambda i: {}),
+        ("POST /temas/import", "POST", "/temas/import", importacao),
+        ("POST /item", "POST", "/item", lambda i: {"nome_tema": tema(i), "nome_item": "bench-%d" % i}),
+        ("PUT /item", "PUT", "/item", lambda i: {"nome_tema": tema(i), "nome_item_velho": "bench-%d" % i,
+                                                 "nome_item_novo": "bench-renomeado-%d" % i}),
+        ("GET /item", "GET", "/item", lambda i: {"nome_tema": tema(i), "nome_item": item(i)}),
+        ("GET /itens", "GET", "/itens", lambda i: {"nome_tema": tema(i)}),
+        ("GET /itens/busca", "GET", "/itens/busca", lambda i: {"q": item(i)}),
+        ("DELETE /item", "DELETE", "/item", lambda i: {"nome_tema": tema(i), "nome_item": "bench-renomeado-%d" % i}),
+        # remove dois itens populados de cada tema; com mais requisições que
+        # temas, as repetições retornam 404
+        ("DELETE /itens/lote", "DELETE", "/itens/lote", lambda i: {"nome_tema": tema(i),
+                                                                   "nomes": [item(0), item(1)]}),
+        # remove os itens dos temas populados; com mais requisições que temas,
+        # as repetições retornam 404
+        ("DELETE /itens", "DELETE", "/itens", lambda i: {"nome_tema": tema(i)}),
+        ("DELETE /tema", "DELETE", "/tema", lambda i: {"nome": "bench-renomeado-%d" % i}),
+        ("DELETE /temas/lote", "DELETE", "/temas/lote",
+         lambda i: {"nomes": ["importado-%d-%d" % (i, j) for j in range(10)]}),
+        ("GET /cache", "GET", "/cache", lambda i: {}),
+        ("GET /pool", "GET", "/pool", lambda i: {}),
+        ("GET /metrics", "GET", "/metrics", lambda i: {}),
+        # remove toda a base; as repetições retornam 404
+        ("DELETE /temas", "DELETE", "/temas", lambda i: {}),
+    ]
+
+
+def popula_base(temas, itens):
+    """ Recria as tabelas e insere os temas e itens do benchmark
+    """
+    from model import Base, Session, Tema, Item, engine, inicializa_base
+
+    inicializa_base()
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    session = Session()
+    session.execute(Tema.__table__.insert(), [{"nome": "tema-%d" % i, "versao": 0, "total_itens": itens}
+                                              for i in range(temas)])
+    ids = [id_tema for id_tema, in session.query(Tema.id).order_by(Tema.id)]
+    lote = []
+    for id_tema in ids:
+        lote.extend({"tema": id_tema, "nome": "item-%d" % j} for j in range(itens))
+        if len(lote) >= 10000:
+            session.execute(Item.__table__.insert(), lote)
+            lote = []
+    if lote:
+        session.execute(Item.__table__.insert(), lote)
+    session.commit()
+    Session.remove()
+
+
+class ClienteFlask:
+    """ Executa as requisições pelo cliente de testes do Flask, sem rede
+    """
+
+    def __init__(self):
+        from app import create_app
+        self.app = create_app()
+
+    def requisita(self, metodo, caminho, parametros):
+        cliente = self.app.test_client()
+        if metodo == "GET":
+            return cliente.get(caminho, query_string=parametros).status_code
+        if isinstance(parametros, str):
+            return cliente.open(caminho, method=metodo, data=parametros,
+                                content_type="application/x-ndjson").status_code
+        return cliente.open(caminho, method=metodo, data=parametros).status_code
+
+
+class ClienteHttp:
+    """ Executa as requisições por HTTP, com uma conexão keep-alive por thread
+    """
+
+    def __init__(self, endereco):
+        self.host, porta = endereco.split(":")
+        self.porta = int(porta)
+        self.local = threading.local()
+
+    def requisita(self, metodo, caminho, parametros):
+        conexao = getattr(self.local, "conexao", None)
+        if conexao is None:
+            conexao = self.local.conexao = http.client.HTTPConnection(self.host, self.porta, timeout=30)
+        if isinstance(parametros, str):
+            conexao.request(metodo, caminho, parametros.encode(),
+                            {"Content-Type": "application/x-ndjson"})
+        elif metodo == "GET":
+            conexao.request(metodo, caminho + "?" + urlencode(parametros, doseq=True))
+        else:
+            conexao.request(metodo, caminho, urlencode(parametros, doseq=True),
+                            {"Content-Type": "application/x-www-form-urlencoded"})
+        resposta = conexao.getresponse()
+        resposta.read()
+        return resposta.status
+
+
+def percentil(ordenados, p):
+    """ Retorna o percentil p (0 a 100) de uma lista ordenada
+    """
+    indice = min(len(ordenados) - 1, max(0, int(round(p / 100 * len(ordenados))) - 1))
+    return ordenados[indice]
+
+
+def mede(cliente, args):
+    """ Executa os cenários com o cliente e retorna as estatísticas por rota
+    """
+    resultados = {}
+    for nome, metodo, caminho, parametros in cenarios(args):
+        def executa(i):
+            inicio = time.perf_counter()
+            status = cliente.requisita(metodo, caminho, parametros(i))
+            return time.perf_counter() - inicio, status
+
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(args.concorrencia) as executor:
+            medicoes = list(executor.map(executa, range(args.requisicoes)))
+        duracao = time.perf_counter() - inicio
+
+        latencias = sorted(latencia for latencia, _ in medicoes)
+        status = {}
+        for _, codigo in medicoes:
+            status[str(codigo)] = status.get(str(codigo), 0) + 1
+        resultados[nome] = {
+            "requisicoes": len(medicoes),
+            "status": status,
+            "vazao_rps": len(medicoes) / duracao,
+            "p50_ms": percentil(latencias, 50) * 1000,
+            "p95_ms": percentil(latencias, 95) * 1000,
+            "p99_ms": percentil(latencias, 99) * 1000,
+            "max_ms": latencias[-1] * 1000,
+        }
+        print("%-20s %8.1f req/s  p50 %7.2f ms  p95 %7.2f ms  p99 %7.2f ms  %s" % (
+            nome, resultados[nome]["vazao_rps"], resultados[nome]["p50_ms"],
+            resultados[nome]["p95_ms"], resultados[nome]["p99_ms"], status))
+    return resultados
+
+
+def inicia_servidor(args, ambiente):
+    """ Inicia um gunicorn com a configuração do projeto e aguarda a porta
+    """
+    endereco = "127.0.0.1:%d" % (5100 + os.getpid() % 500)
+    ambiente = dict(ambiente, GUNICORN_BIND=endereco, GUNICORN_WORKERS=str(args.workers))
+    processo = subprocess.Popen([sys.executable, "-m", "gunicorn", "--config", "gunicorn.conf.py", "app:create_app()"],
+                                cwd=raiz, env=ambiente,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    host, porta = endereco.split(":")
+    for _ in range(100):
+        try:
+            conexao = http.client.HTTPConnection(host, int(porta), timeout=1)
+            conexao.request("GET", "/temas?limit=1")
+            conexao.getresponse().read()
+            return processo, endereco
+        except OSError:
+            time.sleep(0.1)
+    processo.terminate()
+    raise RuntimeError("o servidor não respondeu em %s" % endereco)
+
+
+def main():
+    args = parse_args()
+    saida = os.path.abspath(args.saida)
+    diretorio = tempfile.mkdtemp(prefix="bench-temas-")
+    # a base (se não informada) e os logs do benchmark ficam em um diretório temporário
+    database_url = args.database_url or "sqlite:///%s/bench.sqlite3" % diretorio
+    ambiente = dict(os.environ, DATABASE_URL=database_url, LOG_LEVEL="ERROR")
+    os.environ.update(ambiente)
+    os.chdir(diretorio)
+    sys.path.insert(0, raiz)
+
+    resultado = {
+        "configuracao": {k: v for k, v in vars(args).items() if k not in ("saida", "database_url")},
+        "resultados": {},
+    }
+
+    if args.modo in ("cliente", "ambos"):
+        print("== cliente de testes do Flask")
+        popula_base(args.temas, args.itens)
+        resultado["resultados"]["cliente"] = mede(ClienteFlask(), args)
+
+    if args.modo in ("servidor", "ambos"):
+        print("== servidor HTTP")
+        popula_base(args.temas, args.itens)
+        processo = None
+        if args.url:
+            endereco = args.url
+        else:
+            processo, endereco = inicia_servidor(args, ambiente)
+        try:
+            resultado["resultados"]["servidor"] = mede(ClienteHttp(endereco), args)
+        finally:
+            if processo:
+                processo.terminate()
+                processo.wait()
+
+    with open(saida, "w") as arquivo:
+        json.dump(resultado, arquivo, indent=2)
+    print("Resultados gravados em %s" % saida)
+
+
+if __name__ == "__main__":
+    main()
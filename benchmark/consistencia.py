@@ -0,0 +1,85 @@
+"""Verificação da quantidade de itens mantida nos temas.
+
+Executa, em uma base SQLite própria e por várias threads simultâneas, uma
+sequência aleatória de escritas que alteram os itens dos temas (inclusão,
+renomeação e remoção de itens, remoção em lote e importação) pelo cliente de
+testes do Flask, e compara ao final a coluna total_itens de cada tema com a
+contagem dos seus itens.
+
+Exemplo, a partir do diretório raiz do projeto:
+
+    (env)$ python benchmark/consistencia.py --operacoes 2000 --semente 1
+"""
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+
+raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Verificação da quantidade de itens dos temas")
+    parser.add_argument("--temas", type=int, default=6, help="temas usados nas escritas")
+    parser.add_argument("--itens", type=int, default=8, help="nomes de itens usados nas escritas")
+    parser.add_argument("--operacoes", type=int, default=1000, help="escritas executadas")
+    parser.add_argument("--concorrencia", type=int, default=4, help="escritas simultâneas")
+    parser.add_argument("--semente", type=int, default=None, help="semente dos sorteios")
+    return parser.parse_args()
+
+
+def escreve(cliente, args, sorteio):
+    """ Executa uma escrita sorteada sobre os temas e itens
+    """
+    tema = "tema-%d" % sorteio.randrange(args.temas)
+    item = lambda: "item-%d" % sorteio.randrange(args.itens)
+    operacao = sorteio.randrange(6)
+    if operacao == 0:
+        cliente.post("/item", data={"nome_tema": tema, "nome_item": item()})
+    elif operacao == 1:
+        cliente.delete("/item", data={"nome_tema": tema, "nome_item": item()})
+    elif operacao == 2:
+        cliente.put("/item", data={"nome_tema": tema, "nome_item_velho": item(), "nome_item_novo": item()})
+    elif operacao == 3:
+        cliente.delete("/itens/lote", data={"nome_tema": tema, "nomes": [item() for _ in range(3)]})
+    elif operacao == 4 and sorteio.random() < 0.1:
+        cliente.delete("/itens", data={"nome_tema": tema})
+    else:
+        registros = [{"nome_tema": tema, "nome_item": item()} for _ in range(3)]
+        cliente.post("/temas/import", data="\n".join(json.dumps(registro) for registro in registros))
+
+
+def main():
+    args = parse_args()
+    diretorio = tempfile.mkdtemp(prefix="consistencia-temas-")
+    os.environ.update(DATABASE_URL="sqlite:///%s/consistencia.sqlite3" % diretorio, LOG_LEVEL="ERROR")
+    os.chdir(diretorio)
+    sys.path.insert(0, raiz)
+
+    from model import Session, Tema, inicializa_base
+    from app import create_app
+
+    inicializa_base()
+    app = create_app()
+    app.test_client().post("/temas/import", data="\n".join(
+        json.dumps({"nome": "tema-%d" % i}) for i in range(args.temas)))
+
+    semente = args.semente if args.semente is not None else random.randrange(2 ** 32)
+    sorteios = random.Random(semente)
+    sementes = [sorteios.randrange(2 ** 32) for _ in range(args.operacoes)]
+    with ThreadPoolExecutor(args.concorrencia) as executor:
+        list(executor.map(lambda s: escreve(app.test_client(), args, random.Random(s)), sementes))
+
+    divergentes = Tema.total_itens_divergentes(Session())
+    Session.remove()
+    print("semente %d: %d operações, %d temas divergentes" % (semente, args.operacoes, len(divergentes)))
+    for nome, total_itens, contagem in divergentes:
+        print("  %s: total_itens %d, %d itens" % (nome, total_itens, contagem))
+    sys.exit(1 if divergentes else 0)
+
+
+if __name__ == "__main__":
+    main()
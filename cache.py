@@ -0,0 +1,129 @@
+from collections import OrderedDict
+import json
+import os
+import threading
+import time
+
+
+class CacheLRU:
+    """ Cache em memória do processo, com descarte do item menos usado
+        recentemente (LRU) e expiração por tempo (TTL).
+
+        O tamanho é limitado pela quantidade de entradas e pela soma do tamanho
+        estimado (em bytes) dos valores guardados.
+    """
+
+    def __init__(self, max_entradas: int, max_bytes: int, ttl: float):
+        """
+        Cria um CacheLRU
+
+        Arguments:
+            max_entradas: quantidade máxima de entradas.
+            max_bytes: soma máxima do tamanho estimado dos valores.
+            ttl: tempo, em segundos, que uma entrada permanece válida.
+        """
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.acertos = 0
+        self.falhas = 0
+        # incrementada a cada invalidação, para descartar valores lidos da
+        # base antes de uma escrita concorrente (ver guarda)
+        self.versao = 0
+        self._bytes = 0
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+
+    def busca(self, chave):
+        """ Retorna o valor guardado para a chave, ou None se ausente ou expirado
+        """
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is None or entrada[1] < time.monotonic():
+                if entrada is not None:
+                    self._remove(chave)
+                self.falhas += 1
+                return None
+            self._entradas.move_to_end(chave)
+            self.acertos += 1
+            return entrada[0]
+
+    def guarda(self, chave, valor, versao: int):
+        """ Guarda o valor para a chave
+
+        O valor é ignorado se houve invalidação após a obtenção de versao, pois
+        ele pode ter sido lido da base antes da escrita que a causou.
+        """
+        tamanho = _tamanho(valor)
+        if tamanho > self.max_bytes:
+            return
+        with self._lock:
+            if versao != self.versao:
+                return
+            if chave in self._entradas:
+                self._remove(chave)
+            self._entradas[chave] = (valor, time.monotonic() + self.ttl, tamanho)
+            self._bytes += tamanho
+            while len(self._entradas) > self.max_entradas or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entradas)))
+
+    def invalida(self, *chaves):
+        """ Remove as chaves informadas do cache
+        """
+        with self._lock:
+            self.versao += 1
+            for chave in chaves:
+                if chave in self._entradas:
+                    self._remove(chave)
+
+    def limpa(self):
+        """ Remove todas as entradas do cache
+        """
+        with self._lock:
+            self.versao += 1
+            self._entradas.clear()
+            self._bytes = 0
+
+    def estatisticas(self):
+        """ Retorna os contadores de uso do cache
+        """
+        with self._lock:
+            return {
+                "acertos": self.acertos,
+                "falhas": self.falhas,
+                "entradas": len(self._entradas),
+                "bytes": self._bytes
+            }
+
+    def _remove(self, chave):
+        """ Remove uma entrada; deve ser chamado com o lock adquirido
+        """
+        self._bytes -= self._entradas.pop(chave)[2]
+
+
+def _tamanho(valor):
+    """ Estima o tamanho de um valor em bytes: o próprio tamanho para valores
+        já serializados e o da serialização JSON para os demais
+    """
+    if isinstance(valor, (bytes, str)):
+        return len(valor)
+    if isinstance(valor, tuple):
+        return sum(_tamanho(parte) for parte in valor)
+    return len(json.dumps(valor))
+
+
+# Limites dos caches, configuráveis por variáveis de ambiente. Cada processo
+# (worker) tem seu próprio cache e só enxerga as invalidações feitas por ele,
+# então o TTL limita por quanto tempo outro worker pode servir um dado antigo.
+max_entradas = int(os.environ.get("CACHE_TEMAS_MAX_ENTRADAS", 1024))
+max_bytes = int(os.environ.get("CACHE_TEMAS_MAX_BYTES", 16 * 1024 * 1024))
+ttl = float(os.environ.get("CACHE_TEMAS_TTL", 10))
+
+# (versão, representação JSON já serializada) dos temas, pelo nome
+cache_temas = CacheLRU(max_entradas, max_bytes, ttl)
+# chave primária (pk_tema) dos temas, pelo nome
+cache_ids_temas = CacheLRU(max_entradas, max_bytes, ttl)
+# (versão, página JSON já serializada) das listagens de /temas e /itens, pelos
+# parâmetros da listagem; uma página só é usada se a sua versão for a atual na
+# base, então este cache não precisa ser invalidado nas escritas
+cache_paginas = CacheLRU(max_entradas, max_bytes, ttl)
@@ -0,0 +1,64 @@
+# Configuração do gunicorn, servidor WSGI de produção da API.
+# Carregada automaticamente ao executar `gunicorn 'app:create_app()'` neste diretório;
+# os valores podem ser alterados por variáveis de ambiente.
+import multiprocessing
+import os
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:5010")
+
+# processos: por padrão, 2 por CPU + 1
+workers = int(os.environ.get("GUNICORN_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+# threads por processo, atendendo requisições enquanto outras aguardam o banco.
+# Com GUNICORN_WORKER_CLASS=gevent (modo assíncrono), cada processo atende até
+# worker_connections clientes simultâneos em greenlets, sem uma thread por
+# requisição, o que é indicado para muitos clientes keep-alive
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
+worker_connections = int(os.environ.get("GUNICORN_WORKER_CONNECTIONS", 1000))
+
+# conexões keep-alive mantidas abertas por alguns segundos entre requisições
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", 5))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 30))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", 30))
+
+# reinicia cada worker após um número de requisições, com variação aleatória
+# para que os workers não reiniciem todos ao mesmo tempo
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 10000))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", 1000))
+
+# carrega o app (app.py) uma única vez no processo principal, antes de criar
+# os workers, que o compartilham por fork. No modo gevent o app é carregado em
+# cada worker, após o monkey patching, para que a sessão por thread do
+# SQLAlchemy e os locks dos caches sejam por greenlet
+preload_app = worker_class != "gevent"
+
+accesslog = os.environ.get("GUNICORN_ACCESSLOG", None)
+
+
+def post_fork(server, worker):
+    """ Descarta no worker as conexões do pool herdadas do processo principal,
+        sem fechá-las, pois ainda pertencem a ele.
+
+    Sem preload_app (modo gevent) o worker não herda o modelo, e ele não deve
+    ser importado aqui: o post_fork é executado antes do monkey patching do
+    gevent, e a sessão por thread e os locks do pool seriam criados sem
+    suporte a greenlets, compartilhados por todas as requisições do worker.
+    """
+    if not preload_app:
+        return
+    from model import engine
+    engine.dispose(close=False)
+
+
+def post_worker_init(worker):
+    """ No modo gevent, torna o driver do PostgreSQL cooperativo, para que a
+        espera pelo banco libere o worker para outros clientes.
+
+    Executado após o monkey patching e a carga do app no worker.
+    """
+    if worker_class != "gevent":
+        return
+    from model import engine
+    if engine.dialect.driver == "psycopg2":
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()
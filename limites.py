@@ -0,0 +1,275 @@
+import math
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+
+class ArmazenamentoMemoria:
+    """ Baldes de fichas (token bucket) na memória do processo; com vários
+        workers do gunicorn, cada um aplica os limites às requisições que
+        atende.
+    """
+
+    def __init__(self):
+        """
+        Cria um ArmazenamentoMemoria vazio
+        """
+        # chave -> (fichas, momento da última atualização, momento em que o
+        # balde estará cheio)
+        self._baldes = {}
+        self._operacoes = 0
+        self._lock = threading.Lock()
+
+    def consome(self, chave, taxa: float, capacidade: float):
+        """ Consome uma ficha do balde da chave
+
+        Retorna 0 se havia ficha ou, caso contrário, os segundos até a próxima.
+        """
+        with self._lock:
+            agora = time.monotonic()
+            fichas, atualizado, _ = self._baldes.get(chave, (capacidade, agora, agora))
+            fichas, espera = _consome_ficha(fichas, agora - atualizado, taxa, capacidade)
+            self._baldes[chave] = (fichas, agora, agora + (capacidade - fichas) / taxa)
+
+            # descarta periodicamente os baldes já cheios, equivalentes a um
+            # balde novo, para que a memória não cresça com os clientes
+            self._operacoes += 1
+            if self._operacoes % 1000 == 0:
+                for chave_cheia in [c for c, balde in self._baldes.items() if balde[2] <= agora]:
+                    del self._baldes[chave_cheia]
+            return espera
+
+
+class ArmazenamentoSQLite:
+    """ Baldes de fichas em um arquivo SQLite local, compartilhado pelos
+        processos (workers) da máquina, para que os limites valham para o
+        conjunto deles.
+    """
+
+    def __init__(self, caminho: str):
+        """
+        Cria um ArmazenamentoSQLite; o arquivo só é aberto na primeira
+        requisição limitada
+
+        Arguments:
+            caminho: caminho do arquivo SQLite dos baldes.
+        """
+        self.caminho = caminho
+        self._local = threading.local()
+        self._operacoes = 0
+
+    def _conexao(self):
+        """ Retorna a conexão da thread com o arquivo, criando-a se preciso
+        """
+        conexao = getattr(self._local, "conexao", None)
+        if conexao is None:
+            conexao = sqlite3.connect(self.caminho, timeout=5, isolation_level=None)
+            conexao.execute("PRAGMA journal_mode = WAL")
+            conexao.execute("PRAGMA synchronous = OFF")
+            conexao.execute("""CREATE TABLE IF NOT EXISTS balde (
+                                   chave TEXT PRIMARY KEY, fichas REAL, atualizado REAL, cheio_em REAL)""")
+            self._local.conexao = conexao
+        return conexao
+
+    def consome(self, chave, taxa: float, capacidade: float):
+        """ Consome uma ficha do balde da chave, em uma transação que bloqueia
+            os demais processos durante a atualização
+
+        Retorna 0 se havia ficha ou, caso contrário, os segundos até a próxima.
+        """
+        conexao = self._conexao()
+        chave = repr(chave)
+        conexao.execute("BEGIN IMMEDIATE")
+        try:
+            agora = time.time()
+            balde = conexao.execute("SELECT fichas, atualizado FROM balde WHERE chave = ?", (chave,)).fetchone()
+            fichas, atualizado = balde if balde else (capacidade, agora)
+            fichas, espera = _consome_ficha(fichas, agora - atualizado, taxa, capacidade)
+            conexao.execute("""INSERT INTO balde (chave, fichas, atualizado, cheio_em) VALUES (?, ?, ?, ?)
+                                   ON CONFLICT (chave) DO UPDATE SET fichas = excluded.fichas,
+                                       atualizado = excluded.atualizado, cheio_em = excluded.cheio_em""",
+                            (chave, fichas, agora, agora + (capacidade - fichas) / taxa))
+
+            # descarta periodicamente os baldes já cheios
+            self._operacoes += 1
+            if self._operacoes % 1000 == 0:
+                conexao.execute("DELETE FROM balde WHERE cheio_em <= ?", (agora,))
+            conexao.execute("COMMIT")
+        except BaseException:
+            conexao.execute("ROLLBACK")
+            raise
+        return espera
+
+
+def _consome_ficha(fichas: float, decorrido: float, taxa: float, capacidade: float):
+    """ Repõe no balde as fichas do tempo decorrido e consome uma, se houver
+
+    Retorna as fichas restantes e a espera, em segundos, até a próxima ficha
+    (0 se a ficha foi consumida).
+    """
+    fichas = min(capacidade, fichas + max(0.0, decorrido) * taxa)
+    if fichas >= 1:
+        return fichas - 1, 0.0
+    return fichas, (1 - fichas) / taxa
+
+
+def valida_limite(taxa: float, capacidade: float, origem: str):
+    """ Verifica um limite de taxa configurado, levantando ValueError se a taxa
+        não for positiva ou se o balde não comportar ao menos uma ficha
+    """
+    if not taxa > 0:
+        raise ValueError("%s: a taxa deve ser maior que zero (%r)" % (origem, taxa))
+    if not capacidade >= 1:
+        raise ValueError("%s: a rajada deve ser de ao menos 1 requisição (%r)" % (origem, capacidade))
+    return taxa, capacidade
+
+
+def le_limites_rotas(texto: str):
+    """ Converte a configuração de limites por rota, no formato
+        "GET /temas=1/5,POST /temas/import=0.2/1" (método e rota = fichas por
+        segundo / capacidade do balde), em um dicionário rota -> (taxa, capacidade)
+
+    Levanta ValueError se uma regra estiver mal formada ou tiver taxa menor ou
+    igual a zero.
+    """
+    limites = {}
+    for regra in filter(None, (parte.strip() for parte in texto.split(","))):
+        try:
+            rota, valores = regra.rsplit("=", 1)
+            taxa, capacidade = valores.split("/")
+            taxa, capacidade = float(taxa), float(capacidade)
+        except ValueError:
+            raise ValueError("LIMITES_ROTAS: regra inválida %r, use \"MÉTODO /rota=taxa/rajada\"" % regra)
+        rota = " ".join(rota.split())
+        limites[rota] = valida_limite(taxa, capacidade, "LIMITES_ROTAS (%s)" % rota)
+    return limites
+
+
+class ControleDeAdmissao:
+    """ Decide se uma requisição é atendida: limite de taxa por cliente e por
+        rota (token bucket) e limite de requisições simultâneas no processo,
+        com um limite menor para as rotas pesadas, para que elas não ocupem
+        todas as vagas das rotas leves.
+
+        As requisições acima dos limites são recusadas imediatamente, em vez
+        de aguardar na fila do worker.
+    """
+
+    def __init__(self, armazenamento, limite_padrao=None, limites_rotas=None,
+                 max_concorrencia: int = 0, max_concorrencia_pesadas: int = 0,
+                 rotas_pesadas=(), rotas_isentas=(), chaves_clientes=()):
+        """
+        Cria um ControleDeAdmissao
+
+        Arguments:
+            armazenamento: armazenamento dos baldes de fichas.
+            limite_padrao: (taxa, capacidade) das rotas sem limite próprio, ou
+                           None para não limitá-las.
+            limites_rotas: dicionário "MÉTODO /rota" -> (taxa, capacidade).
+            max_concorrencia: requisições simultâneas no processo (0: sem limite).
+            max_concorrencia_pesadas: requisições simultâneas das rotas pesadas
+                                      no processo (0: sem limite).
+            rotas_pesadas: rotas ("MÉTODO /rota") sujeitas ao limite acima.
+            rotas_isentas: rotas não sujeitas a nenhum limite.
+            chaves_clientes: chaves de API que identificam um cliente; as
+                             demais são ignoradas e o cliente é
+                             identificado pelo endereço IP.
+        """
+        self.armazenamento = armazenamento
+        self.limite_padrao = limite_padrao
+        self.limites_rotas = limites_rotas or {}
+        self.rotas_pesadas = set(rotas_pesadas)
+        self.rotas_isentas = set(rotas_isentas)
+        self.chaves_clientes = frozenset(chaves_clientes)
+        self._vagas = threading.BoundedSemaphore(max_concorrencia) if max_concorrencia else None
+        self._vagas_pesadas = threading.BoundedSemaphore(max_concorrencia_pesadas) \
+            if max_concorrencia_pesadas else None
+
+    def identifica_cliente(self, chave, endereco: str):
+        """ Retorna o cliente a que são aplicados os limites de taxa: a chave de
+            API, se ela é uma das chaves configuradas, ou o endereço IP
+
+        Uma chave qualquer informada pelo cliente não é usada, pois cada chave
+        nova teria um balde cheio e o cliente escaparia dos limites.
+        """
+        if chave and chave in self.chaves_clientes:
+            return "chave", chave
+        return "ip", endereco
+
+    def limita_taxa(self, cliente, rota: str):
+        """ Consome uma ficha do balde do cliente na rota
+
+        Retorna 0 se a requisição pode ser atendida ou, caso contrário, os
+        segundos (arredondados para cima) até a próxima ficha.
+        """
+        if rota in self.rotas_isentas:
+            return 0
+        limite = self.limites_rotas.get(rota, self.limite_padrao)
+        if not limite:
+            return 0
+        espera = self.armazenamento.consome((cliente, rota), *limite)
+        return math.ceil(espera) if espera else 0
+
+    def admite(self, rota: str):
+        """ Ocupa as vagas de requisições simultâneas da rota, sem aguardar
+
+        Retorna a lista das vagas ocupadas, a serem devolvidas por libera, ou
+        None se não há vaga.
+        """
+        if rota in self.rotas_isentas:
+            return []
+        vagas = [self._vagas]
+        if rota in self.rotas_pesadas:
+            vagas.append(self._vagas_pesadas)
+        ocupadas = []
+        for vaga in filter(None, vagas):
+            if not vaga.acquire(blocking=False):
+                self.libera(ocupadas)
+                return None
+            ocupadas.append(vaga)
+        return ocupadas
+
+    def libera(self, vagas):
+        """ Devolve as vagas ocupadas por admite
+        """
+        for vaga in vagas:
+            vaga.release()
+
+
+# Limites da API, configuráveis por variáveis de ambiente e desativados por
+# padrão. Com LIMITES_ARMAZENAMENTO=sqlite, os baldes ficam em um arquivo
+# local compartilhado pelos workers da máquina.
+taxa_padrao = float(os.environ.get("LIMITE_TAXA", 0))
+capacidade_padrao = float(os.environ.get("LIMITE_RAJADA", max(1.0, taxa_padrao * 2)))
+if taxa_padrao < 0:
+    raise ValueError("LIMITE_TAXA: a taxa não pode ser negativa (%r)" % taxa_padrao)
+limite_padrao = valida_limite(taxa_padrao, capacidade_padrao, "LIMITE_TAXA/LIMITE_RAJADA") \
+    if taxa_padrao > 0 else None
+
+if os.environ.get("LIMITES_ARMAZENAMENTO", "memoria") == "sqlite":
+    armazenamento = ArmazenamentoSQLite(os.environ.get(
+        "LIMITES_ARQUIVO", os.path.join(tempfile.gettempdir(), "tema-itens-limites.sqlite3")))
+else:
+    armazenamento = ArmazenamentoMemoria()
+
+# cabeçalho com a chave de API que identifica o cliente e as chaves aceitas
+# (separadas por vírgula); sem uma delas, o cliente é identificado pelo
+# endereço IP
+cabecalho_chave = os.environ.get("LIMITES_CABECALHO_CHAVE", "X-API-Key")
+chaves_clientes = [chave.strip() for chave in os.environ.get("LIMITES_CHAVES", "").split(",") if chave.strip()]
+
+# rotas que leem ou escrevem muitos registros por requisição
+ROTAS_PESADAS = ("GET /temas", "GET /temas/export", "POST /temas/import", "GET /temas/lote",
+                 "GET /itens/busca", "DELETE /temas", "DELETE /temas/lote")
+
+admissao = ControleDeAdmissao(
+    armazenamento,
+    limite_padrao=limite_padrao,
+    limites_rotas=le_limites_rotas(os.environ.get("LIMITES_ROTAS", "")),
+    max_concorrencia=int(os.environ.get("LIMITE_CONCORRENCIA", 0)),
+    max_concorrencia_pesadas=int(os.environ.get("LIMITE_CONCORRENCIA_PESADAS", 0)),
+    rotas_pesadas=ROTAS_PESADAS,
+    rotas_isentas=("GET /metrics",),
+    chaves_clientes=chaves_clientes)
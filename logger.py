@@ -1,16 +1,40 @@
 from logging.config import dictConfig
+from logging.handlers import QueueHandler, QueueListener
+import atexit
+import json
 import logging
 import os
+import queue
 
 
 log_path = "log/"
-# Verifica se o diretorio para armazenar os logs não existe
-if not os.path.exists(log_path):
-   # então cria o diretorio
-   os.makedirs(log_path)
 
 
-dictConfig({
+class JsonFormatter(logging.Formatter):
+    """ Formata cada registro de log como um objeto JSON em uma linha
+    """
+
+    def format(self, record):
+        registro = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "function": record.funcName,
+            "line": record.lineno,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            registro["exception"] = self.formatException(record.exc_info)
+        return json.dumps(registro, ensure_ascii=False)
+
+
+# formato dos logs: "text" (padrão) ou "json", por variável de ambiente
+log_format = os.environ.get("LOG_FORMAT", "text")
+log_level = os.environ.get("LOG_LEVEL", "INFO")
+
+
+# configuração dos handlers, aplicada por configura_logs
+CONFIGURACAO_LOGS = {
     "version": 1,
     "disable_existing_loggers": True,
     "formatters": {
@@ -19,12 +43,15 @@ dictConfig({
         },
         "detailed": {
             "format": "[%(asctime)s] %(levelname)-4s %(funcName)s() L%(lineno)-4d %(message)s - call_trace=%(pathname)s L%(lineno)-4d",
+        },
+        "json": {
+            "()": JsonFormatter,
         }
     },
     "handlers": {
         "console": {
             "class": "logging.StreamHandler",
-            "formatter": "default",
+            "formatter": "json" if log_format == "json" else "default",
             "stream": "ext://sys.stdout",
         },
         # "email": {
@@ -39,17 +66,17 @@ dictConfig({
         # },
         "error_file": {
             "class": "logging.handlers.RotatingFileHandler",
-            "formatter": "detailed",
+            "formatter": "json" if log_format == "json" else "detailed",
             "filename": "log/gunicorn.error.log",
-            "maxBytes": 10000,
+            "maxBytes": 10 * 1024 * 1024,
             "backupCount": 10,
             "delay": "True",
         },
         "detailed_file": {
             "class": "logging.handlers.RotatingFileHandler",
-            "formatter": "detailed",
+            "formatter": "json" if log_format == "json" else "detailed",
             "filename": "log/gunicorn.detailed.log",
-            "maxBytes": 10000,
+            "maxBytes": 10 * 1024 * 1024,
             "backupCount": 10,
             "delay": "True",
         }
@@ -57,15 +84,78 @@ dictConfig({
     "loggers": {
         "gunicorn.error": {
             "handlers": ["console", "error_file"],  #, email],
-            "level": "INFO",
+            "level": log_level,
             "propagate": False,
+        },
+        # o logger da API, criado antes da configuração, é mantido ativo
+        __name__: {
+            "level": log_level,
         }
     },
     "root": {
         "handlers": ["console", "detailed_file"],
-        "level": "INFO",
+        "level": log_level,
     }
-})
+}
+
+
+class FilaDeLog:
+    """ Move a escrita dos logs de um logger para uma thread em segundo plano:
+        os handlers configurados acima passam a ser chamados por um
+        QueueListener, e o logger apenas enfileira os registros.
+    """
+
+    def __init__(self, nome_logger):
+        """
+        Cria uma FilaDeLog para o logger de nome informado
+
+        Arguments:
+            nome_logger: nome do logger (None para o root).
+        """
+        self.logger = logging.getLogger(nome_logger)
+        self.handlers = self.logger.handlers
+        self.listener = None
+        self.inicia()
+
+    def inicia(self):
+        """ Inicia a thread de escrita, com uma nova fila
+        """
+        fila = queue.SimpleQueue()
+        self.logger.handlers = [QueueHandler(fila)]
+        self.listener = QueueListener(fila, *self.handlers, respect_handler_level=True)
+        self.listener.start()
+
+    def para(self):
+        """ Escreve os registros pendentes e encerra a thread de escrita
+        """
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+
+
+filas = []
+
+
+def configura_logs():
+    """ Cria o diretório de logs, configura os handlers e inicia as threads de
+        escrita, uma única vez por processo
+
+    Chamada ao criar o app (ver create_app em app.py), e não ao importar este
+    módulo, para que a importação não faça I/O.
+    """
+    if filas:
+        return
+    # Verifica se o diretorio para armazenar os logs não existe
+    if not os.path.exists(log_path):
+       # então cria o diretorio
+       os.makedirs(log_path)
+
+    dictConfig(CONFIGURACAO_LOGS)
+    filas.extend([FilaDeLog(None), FilaDeLog("gunicorn.error")])
+    atexit.register(lambda: [fila.para() for fila in filas])
+    # a thread de escrita não sobrevive ao fork (ex.: workers do gunicorn com o
+    # app pré-carregado), então cada processo filho inicia a sua
+    os.register_at_fork(after_in_child=lambda: [fila.inicia() for fila in filas])
 
 
 logger = logging.getLogger(__name__)
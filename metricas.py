@@ -0,0 +1,198 @@
+from bisect import bisect_left
+import os
+import threading
+
+
+# limites (em segundos) dos buckets dos histogramas de tempo
+BUCKETS_TEMPO = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# limites dos buckets do histograma de quantidade de consultas por requisição
+BUCKETS_CONSULTAS = (1, 2, 3, 5, 10, 20, 50, 100, 200)
+
+
+def _formata_rotulos(nomes, valores, *extras):
+    """ Retorna os rótulos de uma série no formato de exposição do Prometheus,
+        seguidos dos pares (nome, valor) extras
+    """
+    pares = list(zip(nomes, valores)) + [extra for extra in extras if extra]
+    if not pares:
+        return ""
+    return "{%s}" % ",".join('%s="%s"' % (nome, str(valor).replace("\\", "\\\\").replace('"', '\\"'))
+                             for nome, valor in pares)
+
+
+def _formata_valor(valor):
+    """ Retorna um valor numérico no formato de exposição do Prometheus
+    """
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+class Contador:
+    """ Contador monotônico, com uma série por combinação de rótulos
+    """
+
+    def __init__(self, nome: str, descricao: str, rotulos=()):
+        """
+        Cria um Contador
+
+        Arguments:
+            nome: nome da métrica.
+            descricao: texto de ajuda da métrica.
+            rotulos: nomes dos rótulos das séries.
+        """
+        self.nome = nome
+        self.descricao = descricao
+        self.rotulos = tuple(rotulos)
+        self._valores = {}
+        self._lock = threading.Lock()
+
+    def incrementa(self, *valores_rotulos, valor=1):
+        """ Soma valor à série dos rótulos informados
+        """
+        with self._lock:
+            self._valores[valores_rotulos] = self._valores.get(valores_rotulos, 0) + valor
+
+    def exporta(self, rotulo_processo=None):
+        """ Retorna as linhas da métrica no formato de exposição do Prometheus,
+            com o rótulo (nome, valor) do processo em cada série
+        """
+        linhas = ["# HELP %s %s" % (self.nome, self.descricao), "# TYPE %s counter" % self.nome]
+        with self._lock:
+            for valores, valor in sorted(self._valores.items()):
+                linhas.append("%s%s %s" % (self.nome, _formata_rotulos(self.rotulos, valores, rotulo_processo),
+                                           _formata_valor(valor)))
+        return linhas
+
+
+class Histograma:
+    """ Histograma de observações com buckets cumulativos, com uma série por
+        combinação de rótulos
+    """
+
+    def __init__(self, nome: str, descricao: str, rotulos=(), buckets=BUCKETS_TEMPO):
+        """
+        Cria um Histograma
+
+        Arguments:
+            nome: nome da métrica.
+            descricao: texto de ajuda da métrica.
+            rotulos: nomes dos rótulos das séries.
+            buckets: limites superiores dos buckets, em ordem crescente.
+        """
+        self.nome = nome
+        self.descricao = descricao
+        self.rotulos = tuple(rotulos)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observa(self, *valores_rotulos, valor):
+        """ Registra uma observação na série dos rótulos informados
+        """
+        with self._lock:
+            serie = self._series.get(valores_rotulos)
+            if serie is None:
+                # contagem por bucket (o último é +Inf), soma e total
+                serie = self._series[valores_rotulos] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            serie[0][bisect_left(self.buckets, valor)] += 1
+            serie[1] += valor
+            serie[2] += 1
+
+    def exporta(self, rotulo_processo=None):
+        """ Retorna as linhas da métrica no formato de exposição do Prometheus,
+            com o rótulo (nome, valor) do processo em cada série
+        """
+        linhas = ["# HELP %s %s" % (self.nome, self.descricao), "# TYPE %s histogram" % self.nome]
+        with self._lock:
+            for valores, (contagens, soma, total) in sorted(self._series.items()):
+                acumulado = 0
+                for limite, contagem in zip(self.buckets + ("+Inf",), contagens):
+                    acumulado += contagem
+                    rotulos = _formata_rotulos(self.rotulos, valores, rotulo_processo, ("le", limite))
+                    linhas.append("%s_bucket%s %d" % (self.nome, rotulos, acumulado))
+                rotulos = _formata_rotulos(self.rotulos, valores, rotulo_processo)
+                linhas.append("%s_sum%s %s" % (self.nome, rotulos, _formata_valor(soma)))
+                linhas.append("%s_count%s %d" % (self.nome, rotulos, total))
+        return linhas
+
+
+class Medidor:
+    """ Valor instantâneo, lido de uma função no momento da exportação
+    """
+
+    def __init__(self, nome: str, descricao: str, leitura, tipo: str = "gauge"):
+        """
+        Cria um Medidor
+
+        Arguments:
+            nome: nome da métrica.
+            descricao: texto de ajuda da métrica.
+            leitura: função sem argumentos que retorna o valor atual.
+            tipo: tipo da métrica (gauge ou counter).
+        """
+        self.nome = nome
+        self.descricao = descricao
+        self.leitura = leitura
+        self.tipo = tipo
+
+    def exporta(self, rotulo_processo=None):
+        """ Retorna as linhas da métrica no formato de exposição do Prometheus,
+            com o rótulo (nome, valor) do processo na série
+        """
+        return ["# HELP %s %s" % (self.nome, self.descricao),
+                "# TYPE %s %s" % (self.nome, self.tipo),
+                "%s%s %s" % (self.nome, _formata_rotulos((), (), rotulo_processo),
+                             _formata_valor(self.leitura()))]
+
+
+class Registro:
+    """ Conjunto de métricas exportadas juntas
+    """
+
+    def __init__(self):
+        """
+        Cria um Registro vazio
+        """
+        self.metricas = []
+
+    def registra(self, metrica):
+        """ Adiciona uma métrica ao registro e a retorna
+        """
+        self.metricas.append(metrica)
+        return metrica
+
+    def exporta(self):
+        """ Retorna todas as métricas no formato de exposição do Prometheus
+
+        Cada série recebe o rótulo pid, do processo que a mantém: com vários
+        workers do gunicorn, cada coleta é atendida por um deles, e as séries
+        de cada worker só são contínuas se distinguidas das dos demais. Os
+        totais da API são obtidos somando-as, ex.:
+        sum without (pid) (rate(http_requests_total[5m])).
+        """
+        rotulo_processo = ("pid", os.getpid())
+        linhas = []
+        for metrica in self.metricas:
+            linhas.extend(metrica.exporta(rotulo_processo))
+        return "\n".join(linhas) + "\n"
+
+
+# Métricas da API. Os valores são do processo que atende a requisição de
+# /metrics; com vários workers do gunicorn, cada um mantém os seus, expostos
+# com o rótulo pid do worker.
+registro = Registro()
+
+requisicoes = registro.registra(Contador(
+    "http_requests_total", "Requisições atendidas, por rota, método e status.",
+    ("rota", "metodo", "status")))
+duracao_requisicoes = registro.registra(Histograma(
+    "http_request_duration_seconds", "Duração das requisições, por rota e método.",
+    ("rota", "metodo")))
+consultas_requisicao = registro.registra(Histograma(
+    "db_queries_per_request", "Comandos SQL executados por requisição, por rota.",
+    ("rota",), BUCKETS_CONSULTAS))
+tempo_sql_requisicao = registro.registra(Histograma(
+    "db_time_per_request_seconds", "Tempo gasto em comandos SQL por requisição, por rota.",
+    ("rota",)))
+requisicoes_recusadas = registro.registra(Contador(
+    "http_requests_rejected_total", "Requisições recusadas pelos limites de taxa e de concorrência, por rota e motivo.",
+    ("rota", "motivo")))
@@ -0,0 +1,37 @@
+from alembic import context
+
+from model import Base, engine
+
+# metadados dos modelos, comparados com a base pelo autogenerate
+# (alembic revision --autogenerate -m "...")
+target_metadata = Base.metadata
+
+
+def inclui_objeto(objeto, nome, tipo, refletido, comparado_com):
+    """ Ignora no autogenerate o índice de busca (FTS5) e suas tabelas internas,
+        mantidos pelas funções de model/busca.py
+    """
+    return not (tipo == "table" and nome.startswith("busca_item"))
+
+
+def executa_migracoes(conexao):
+    """ Executa as migrações na conexão informada
+    """
+    context.configure(connection=conexao,
+                      target_metadata=target_metadata,
+                      include_object=inclui_objeto,
+                      # no SQLite, as alterações não suportadas pelo ALTER TABLE
+                      # são feitas recriando a tabela (batch mode)
+                      render_as_batch=conexao.dialect.name == "sqlite")
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+# usa a conexão recebida de inicializa_base (model/__init__.py) ou, pela linha
+# de comando do alembic, uma nova conexão da engine da API
+conexao = context.config.attributes.get("connection")
+if conexao is not None:
+    executa_migracoes(conexao)
+else:
+    with engine.connect() as conexao:
+        executa_migracoes(conexao)
@@ -0,0 +1,37 @@
+"""esquema inicial: tabelas tema e item
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 10:00:00
+
+Bases criadas antes das migrações (por create_all) são marcadas com esta
+revisão por inicializa_base, e as revisões seguintes aplicam apenas o que
+falta nelas.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "tema",
+        sa.Column("pk_tema", sa.Integer(), primary_key=True),
+        sa.Column("nome", sa.String(140), unique=True),
+    )
+    op.create_table(
+        "item",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("nome", sa.String(140)),
+        sa.Column("tema", sa.Integer(), sa.ForeignKey("tema.pk_tema"), nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_table("item")
+    op.drop_table("tema")
@@ -0,0 +1,42 @@
+"""restrição de unicidade do nome do item no tema
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 10:00:00
+
+Remove antes os itens órfãos (o SQLite não verifica as chaves estrangeiras) e
+os duplicados no tema, mantendo o mais antigo. No PostgreSQL, o índice da
+restrição é criado sem bloquear as escritas na tabela (CONCURRENTLY).
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    conexao = op.get_bind()
+    restricoes = sa.inspect(conexao).get_unique_constraints("item")
+    if any(restricao["name"] == "uq_item_tema_nome" for restricao in restricoes):
+        return
+
+    op.execute("DELETE FROM item WHERE tema NOT IN (SELECT pk_tema FROM tema)")
+    op.execute("DELETE FROM item WHERE id NOT IN (SELECT MIN(id) FROM item GROUP BY tema, nome)")
+
+    if conexao.dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.create_index("uq_item_tema_nome", "item", ["tema", "nome"],
+                            unique=True, postgresql_concurrently=True)
+        op.execute("ALTER TABLE item ADD CONSTRAINT uq_item_tema_nome UNIQUE USING INDEX uq_item_tema_nome")
+    else:
+        with op.batch_alter_table("item") as batch_op:
+            batch_op.create_unique_constraint("uq_item_tema_nome", ["tema", "nome"])
+
+
+def downgrade():
+    with op.batch_alter_table("item") as batch_op:
+        batch_op.drop_constraint("uq_item_tema_nome", type_="unique")
@@ -0,0 +1,35 @@
+"""versão da base e dos temas, usada nos ETags
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 10:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspetor = sa.inspect(op.get_bind())
+    if not inspetor.has_table("versao"):
+        op.create_table(
+            "versao",
+            sa.Column("id", sa.Integer(), primary_key=True, autoincrement=False),
+            sa.Column("valor", sa.Integer(), nullable=False),
+        )
+        op.execute("INSERT INTO versao (id, valor) VALUES (1, 0)")
+
+    if not any(coluna["name"] == "versao" for coluna in inspetor.get_columns("tema")):
+        with op.batch_alter_table("tema") as batch_op:
+            batch_op.add_column(sa.Column("versao", sa.Integer(), nullable=False, server_default="0"))
+
+
+def downgrade():
+    with op.batch_alter_table("tema") as batch_op:
+        batch_op.drop_column("versao")
+    op.drop_table("versao")
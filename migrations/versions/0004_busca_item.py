@@ -0,0 +1,23 @@
+"""índice de busca textual dos itens (SQLite FTS5)
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 10:00:00
+"""
+from alembic import op
+
+from model.busca import cria_indice_busca, remove_indice_busca
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    cria_indice_busca(op.get_bind())
+
+
+def downgrade():
+    remove_indice_busca(op.get_bind())
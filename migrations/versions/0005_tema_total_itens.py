@@ -0,0 +1,31 @@
+"""quantidade de itens do tema
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 10:10:00
+
+A coluna é preenchida com a contagem atual dos itens de cada tema. No SQLite,
+os triggers do índice de busca (0004) são suspensos enquanto a tabela 'tema'
+é alterada.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from model.busca import triggers_busca_suspensos
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with triggers_busca_suspensos(op.get_bind()), op.batch_alter_table("tema") as batch_op:
+        batch_op.add_column(sa.Column("total_itens", sa.Integer(), nullable=False, server_default="0"))
+    op.execute("UPDATE tema SET total_itens = (SELECT COUNT(*) FROM item WHERE item.tema = tema.pk_tema)")
+
+
+def downgrade():
+    with triggers_busca_suspensos(op.get_bind()), op.batch_alter_table("tema") as batch_op:
+        batch_op.drop_column("total_itens")
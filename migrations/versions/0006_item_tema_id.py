@@ -0,0 +1,29 @@
+"""índice dos itens de um tema em ordem de id
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 12:00:00
+
+Atende as páginas de itens de um tema (GET /itens e os primeiros itens de cada
+tema em GET /temas). No PostgreSQL, o índice é criado sem bloquear as escritas
+na tabela (CONCURRENTLY).
+"""
+from alembic import op
+
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.create_index("ix_item_tema_id", "item", ["tema", "id"], postgresql_concurrently=True)
+    else:
+        op.create_index("ix_item_tema_id", "item", ["tema", "id"])
+
+
+def downgrade():
+    op.drop_index("ix_item_tema_id", table_name="item")
@@ -0,0 +1,152 @@
+from contextlib import contextmanager
+
+from sqlalchemy import event, text
+
+from  model import Base
+
+
+# Índice de busca textual dos itens (SQLite FTS5). Cada linha corresponde a um
+# item (rowid = item.id) e guarda o nome do item e o nome do seu tema; o índice
+# é mantido em sincronia com as tabelas 'item' e 'tema' pelos triggers abaixo,
+# inclusive nas escritas em lote. Os acentos são ignorados na busca e há
+# índices de prefixo de 2 e 3 caracteres para acelerar as buscas por prefixo.
+DDL_BUSCA = [
+    """CREATE VIRTUAL TABLE busca_item USING fts5(
+           nome_item, nome_tema,
+           tokenize = 'unicode61 remove_diacritics 2',
+           prefix = '2 3')""",
+    """INSERT INTO busca_item (rowid, nome_item, nome_tema)
+           SELECT item.id, item.nome, tema.nome FROM item JOIN tema ON tema.pk_tema = item.tema""",
+]
+
+TRIGGERS_BUSCA = [
+    """CREATE TRIGGER IF NOT EXISTS busca_item_insert AFTER INSERT ON item BEGIN
+           INSERT INTO busca_item (rowid, nome_item, nome_tema)
+               SELECT new.id, new.nome, tema.nome FROM tema WHERE tema.pk_tema = new.tema;
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS busca_item_delete AFTER DELETE ON item BEGIN
+           DELETE FROM busca_item WHERE rowid = old.id;
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS busca_item_update AFTER UPDATE OF nome ON item BEGIN
+           UPDATE busca_item SET nome_item = new.nome WHERE rowid = new.id;
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS busca_tema_update AFTER UPDATE OF nome ON tema BEGIN
+           UPDATE busca_item SET nome_tema = new.nome
+               WHERE rowid IN (SELECT id FROM item WHERE item.tema = new.pk_tema);
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS busca_tema_delete AFTER DELETE ON tema BEGIN
+           DELETE FROM busca_item
+               WHERE rowid IN (SELECT id FROM item WHERE item.tema = old.pk_tema);
+       END""",
+]
+
+
+def cria_indice_busca(connection):
+    """ Cria o índice de busca e seus triggers, caso a base seja SQLite
+
+    Em uma base já existente, o índice é criado e preenchido com os itens
+    cadastrados uma única vez.
+    """
+    if connection.dialect.name != "sqlite":
+        return
+
+    existe = connection.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'busca_item'")).first()
+    if not existe:
+        for comando in DDL_BUSCA:
+            connection.execute(text(comando))
+    for comando in TRIGGERS_BUSCA:
+        connection.execute(text(comando))
+
+
+def remove_indice_busca(connection):
+    """ Remove o índice de busca e seus triggers, caso a base seja SQLite
+    """
+    if connection.dialect.name != "sqlite":
+        return
+
+    _remove_triggers_busca(connection)
+    connection.execute(text("DROP TABLE IF EXISTS busca_item"))
+
+
+def _remove_triggers_busca(connection):
+    """ Remove os triggers do índice de busca, retornando quantos existiam
+    """
+    triggers = connection.execute(text(
+        "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'busca_%'")).scalars().all()
+    for trigger in triggers:
+        connection.execute(text('DROP TRIGGER IF EXISTS "%s"' % trigger))
+    return len(triggers)
+
+
+@contextmanager
+def triggers_busca_suspensos(connection):
+    """ Remove os triggers do índice de busca durante o bloco, recriando-os ao
+        final, caso a base seja SQLite
+
+    Usado nas migrações que recriam as tabelas 'tema' ou 'item' (batch mode):
+    os triggers referenciam essas tabelas e impedem a troca da tabela antiga
+    pela nova. O índice é mantido, pois a recriação preserva as chaves dos
+    registros.
+    """
+    if connection.dialect.name != "sqlite":
+        yield
+        return
+
+    existiam = _remove_triggers_busca(connection)
+    yield
+    if existiam:
+        for comando in TRIGGERS_BUSCA:
+            connection.execute(text(comando))
+
+
+@event.listens_for(Base.metadata, "after_create")
+def cria_busca(metadata, connection, **kw):
+    """ Cria o índice de busca junto com as tabelas
+    """
+    cria_indice_busca(connection)
+
+
+@event.listens_for(Base.metadata, "before_drop")
+def remove_busca(metadata, connection, **kw):
+    """ Remove o índice de busca junto com as tabelas
+    """
+    remove_indice_busca(connection)
+
+
+def termos_fts(busca: str):
+    """ Converte o texto buscado em uma consulta FTS5 em que cada palavra é
+        buscada como prefixo (ex.: 'cach ani' -> '"cach"* "ani"*')
+    """
+    palavras = busca.split()
+    return " ".join('"%s"*' % palavra.replace('"', '""') for palavra in palavras)
+
+
+def busca_itens(session, busca: str, limite: int, posicao: int = 0):
+    """ Busca itens cujo nome ou o nome do tema contenham palavras iniciadas
+        pelas palavras buscadas
+
+    Retorna uma lista de (nome_item, nome_tema) ordenada por relevância, a
+    partir da posição informada.
+    """
+    if not busca.split():
+        return []
+
+    if session.get_bind().dialect.name == "sqlite":
+        # ordenados pelo bm25, com os nomes de itens com peso maior que os de temas
+        return session.execute(text(
+            """SELECT nome_item, nome_tema FROM busca_item
+                   WHERE busca_item MATCH :termos
+                   ORDER BY bm25(busca_item, 2.0, 1.0), rowid
+                   LIMIT :limite OFFSET :posicao"""),
+            {"termos": termos_fts(busca), "limite": limite, "posicao": posicao}).all()
+
+    # em outros bancos, busca o texto inteiro como prefixo dos nomes
+    prefixo = busca.lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    return session.execute(text(
+        """SELECT item.nome, tema.nome FROM item JOIN tema ON tema.pk_tema = item.tema
+               WHERE lower(item.nome) LIKE :prefixo ESCAPE '\\'
+                  OR lower(tema.nome) LIKE :prefixo ESCAPE '\\'
+               ORDER BY item.id
+               LIMIT :limite OFFSET :posicao"""),
+        {"prefixo": prefixo, "limite": limite, "posicao": posicao}).all()
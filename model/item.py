@@ -1,10 +1,16 @@
-from sqlalchemy import Column, String, Integer, ForeignKey
+from sqlalchemy import Column, String, Integer, ForeignKey, Index, UniqueConstraint
 
 from  model import Base
 
 
 class Item(Base):
     __tablename__ = 'item'
+    # o nome do item é único dentro do tema; o índice criado pela restrição
+    # (tema, nome) também atende as buscas dos itens de um tema. O índice
+    # (tema, id) atende as páginas de itens de um tema, em ordem de id, sem
+    # ordenar todos os itens do tema
+    __table_args__ = (UniqueConstraint("tema", "nome", name="uq_item_tema_nome"),
+                      Index("ix_item_tema_id", "tema", "id"))
 
     id = Column(Integer, primary_key=True)
     nome = Column(String(140))
@@ -23,8 +29,3 @@ class Item(Base):
             nome: o nome de um item.
         """
         self.nome = nome
-
-    def atualiza_nome(self, nome:str):
-        """ Atualiza o nome do Item
-        """
-        self.nome = nome
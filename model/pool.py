@@ -0,0 +1,55 @@
+from sqlalchemy.pool import QueuePool
+import threading
+import time
+
+
+class EstatisticasPool:
+    """ Contadores de uso do pool de conexões com o banco
+    """
+
+    def __init__(self):
+        """
+        Cria um EstatisticasPool zerado
+        """
+        self.checkouts = 0
+        self.timeouts = 0
+        self.espera_total = 0.0
+        self.espera_maxima = 0.0
+        self._lock = threading.Lock()
+
+    def registra_checkout(self, espera: float, sucesso: bool):
+        """ Registra uma obtenção de conexão e o tempo de espera por ela
+        """
+        with self._lock:
+            if sucesso:
+                self.checkouts += 1
+            else:
+                self.timeouts += 1
+            self.espera_total += espera
+            self.espera_maxima = max(self.espera_maxima, espera)
+
+
+class QueuePoolMonitorado(QueuePool):
+    """ QueuePool que mede o tempo de espera de cada obtenção de conexão
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.estatisticas = EstatisticasPool()
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        sucesso = False
+        try:
+            conexao = super()._do_get()
+            sucesso = True
+            return conexao
+        finally:
+            self.estatisticas.registra_checkout(time.perf_counter() - inicio, sucesso)
+
+    def recreate(self):
+        # o pool é recriado, por exemplo, em engine.dispose(); os contadores
+        # seguem acumulando no novo pool
+        pool = super().recreate()
+        pool.estatisticas = self.estatisticas
+        return pool
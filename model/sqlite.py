@@ -0,0 +1,46 @@
+from sqlalchemy import event
+import os
+
+
+# Perfil de desempenho do SQLite, aplicado em cada nova conexão. Os valores
+# podem ser alterados por variáveis de ambiente de mesmo nome, prefixadas
+# com SQLITE_ (ex.: SQLITE_SYNCHRONOUS=FULL).
+#  - journal_mode WAL: leituras seguem em paralelo durante uma escrita
+#  - synchronous NORMAL: em WAL, fsync apenas nos checkpoints, sem risco de
+#    corromper a base (uma queda de energia pode desfazer os últimos commits)
+#  - busy_timeout: espera, em ms, pelo lock de escrita antes de falhar
+#  - mmap_size: bytes da base lidos por memória mapeada
+#  - cache_size: páginas em cache por conexão (negativo indica KiB)
+#  - temp_store MEMORY: tabelas e índices temporários em memória
+PRAGMAS_PADRAO = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": "5000",
+    "mmap_size": str(256 * 1024 * 1024),
+    "cache_size": "-65536",
+    "temp_store": "MEMORY",
+}
+
+
+def pragmas_sqlite():
+    """ Retorna os pragmas a aplicar, considerando as variáveis de ambiente
+    """
+    return {nome: os.environ.get("SQLITE_%s" % nome.upper(), valor)
+            for nome, valor in PRAGMAS_PADRAO.items()}
+
+
+def configura_sqlite(engine):
+    """ Aplica os pragmas do perfil de desempenho a cada conexão aberta pela
+        engine, caso ela seja de uma base SQLite.
+    """
+    if engine.dialect.name != "sqlite":
+        return
+
+    pragmas = pragmas_sqlite()
+
+    @event.listens_for(engine, "connect")
+    def aplica_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for nome, valor in pragmas.items():
+            cursor.execute("PRAGMA %s = %s" % (nome, valor))
+        cursor.close()
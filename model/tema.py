@@ -1,7 +1,8 @@
-from sqlalchemy import Column, String, Integer
+from sqlalchemy import Column, String, Integer, func, select
 from sqlalchemy.orm import relationship
 
 from  model import Base, Item
+from model.versao import Versao
 
 
 class Tema(Base):
@@ -9,6 +10,11 @@ class Tema(Base):
 
     id = Column("pk_tema", Integer, primary_key=True)
     nome = Column(String(140), unique=True)
+    # versão da base (ver Versao) na última alteração do tema ou de seus itens
+    versao = Column(Integer, nullable=False, default=0, server_default="0")
+    # quantidade de itens do tema, mantida a cada inserção e remoção de itens,
+    # para apresentar o resumo dos temas sem consultar a tabela 'item'
+    total_itens = Column(Integer, nullable=False, default=0, server_default="0")
 
     # Definição do relacionamento entre o tema e o item.
     # Essa relação é implicita, não está salva na tabela 'tema',
@@ -25,31 +31,29 @@ class Tema(Base):
         """
         self.nome = nome
 
-
-    def adiciona_item(self, item:Item):
-        """ Adiciona um novo comentário ao Tema
+    @staticmethod
+    def total_itens_divergentes(session):
+        """ Retorna (nome, total_itens, contagem) dos temas cuja quantidade de
+            itens mantida difere da contagem dos itens na tabela 'item'
         """
-        for i in self.itens:
-            if i.nome == item.nome:
-                return 0
-        self.itens.append(item)
-        return 1
+        contagem = Tema._contagem_itens()
+        return session.query(Tema.nome, Tema.total_itens, contagem) \
+            .filter(Tema.total_itens != contagem).order_by(Tema.id).all()
 
+    @staticmethod
+    def recalcula_total_itens(session) -> int:
+        """ Recalcula a quantidade de itens dos temas divergentes na transação
+            da sessão, atribuindo a eles a versão da base (a ser incrementada
+            antes por Versao.avanca)
 
-    def atualiza_nome_tema(self, nome_tema:str):
-        """ Atualiza o nome do Tema
+        Retorna a quantidade de temas corrigidos.
         """
-        self.nome = nome_tema
-
+        contagem = Tema._contagem_itens()
+        return session.query(Tema).filter(Tema.total_itens != contagem) \
+            .update({Tema.total_itens: contagem, Tema.versao: Versao.valor_sql()}, synchronize_session=False)
 
-    def atualiza_nome_item(self, nome_item_velho:str, nome_item_novo:str):
-        """ Atualiza o nome de um item
+    @staticmethod
+    def _contagem_itens():
+        """ Retorna a subconsulta SQL com a contagem dos itens de cada tema
         """
-        for i in self.itens:
-            if i.nome == nome_item_novo:
-                return 0
-            
-        for i in self.itens:
-            if i.nome == nome_item_velho:
-                i.nome = nome_item_novo
-                return 1
+        return select(func.count(Item.id)).where(Item.tema == Tema.id).scalar_subquery()
@@ -0,0 +1,50 @@
+from sqlalchemy import Column, Integer, DDL, event, select
+
+from  model import Base
+
+
+class Versao(Base):
+    __tablename__ = 'versao'
+
+    # Tabela de uma única linha com o contador global de alterações da base.
+    # Cada alteração de temas ou itens incrementa o contador e grava o novo
+    # valor na coluna 'versao' dos temas alterados, de modo que a versão de
+    # um tema nunca se repete, mesmo após sua remoção e recriação.
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    valor = Column(Integer, nullable=False)
+
+    @staticmethod
+    def atual(session) -> int:
+        """ Retorna a versão atual da base
+        """
+        return session.query(Versao.valor).filter(Versao.id == 1).scalar()
+
+    @staticmethod
+    def avanca(session):
+        """ Incrementa a versão da base na transação da sessão, sem lê-la
+
+        O novo valor pode ser gravado pelo próprio comando de escrita seguinte
+        com a expressão de Versao.valor_sql().
+        """
+        session.query(Versao).filter(Versao.id == 1) \
+            .update({Versao.valor: Versao.valor + 1}, synchronize_session=False)
+
+    @staticmethod
+    def valor_sql():
+        """ Retorna a subconsulta SQL com a versão atual da base, para uso
+            dentro de outros comandos
+        """
+        return select(Versao.valor).where(Versao.id == 1).scalar_subquery()
+
+    @staticmethod
+    def incrementa(session) -> int:
+        """ Incrementa a versão da base na transação da sessão
+
+        Retorna a nova versão.
+        """
+        Versao.avanca(session)
+        return Versao.atual(session)
+
+
+# cria a linha do contador junto com a tabela
+event.listen(Versao.__table__, "after_create", DDL("INSERT INTO versao (id, valor) VALUES (1, 0)"))
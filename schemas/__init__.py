@@ -1,5 +1,15 @@
-from schemas.item import ItemSchema, ItemUpdSchema, ItemBuscaSchema, ItemViewSchema, ItemDelSchema, ItensDelSchema, apresenta_item, ItemShortSchema, ItensBuscaSchema
+from schemas.paginacao import PaginacaoSchema, LIMITE_PADRAO, LIMITE_MAXIMO
 
-from schemas.tema import TemaSchema, TemaBuscaSchema, TemaViewSchema, ListagemTemasSchema, TemaDelSchema, TemasDelSchema, apresenta_temas, TemaUpdSchema, apresenta_tema
+from schemas.item import ItemSchema, ItemUpdSchema, ItemBuscaSchema, ItemViewSchema, ItemDelSchema, ItensDelSchema, apresenta_item, ItemShortSchema, ItensBuscaSchema, ItensListagemSchema, ItensLoteSchema, ItensLoteDelSchema
+
+from schemas.tema import TemaSchema, TemaBuscaSchema, TemaViewSchema, ListagemTemasSchema, TemaDelSchema, TemasDelSchema, apresenta_temas, TemaUpdSchema, apresenta_tema, TemasBuscaSchema, apresenta_pagina_itens, TemasLoteSchema, TemasLoteViewSchema, LIMITE_LOTE_TEMAS, TemasLoteDelSchema, apresenta_resumo_temas, LIMITE_ITENS_LISTAGEM
 
 from schemas.error import ErrorSchema
+
+from schemas.importacao import ConflitoImportacaoSchema, ImportacaoViewSchema
+
+from schemas.cache import CacheEstatisticasSchema, CacheViewSchema, apresenta_cache
+
+from schemas.pool import PoolViewSchema, apresenta_pool
+
+from schemas.busca import BuscaSchema, BuscaViewSchema, apresenta_busca
@@ -0,0 +1,34 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+from schemas.item import ItemViewSchema
+from schemas.paginacao import PaginacaoSchema
+
+
+class BuscaSchema(PaginacaoSchema):
+    """ Define como deve ser a estrutura que representa a busca textual de
+        itens pelo nome do item ou do tema.
+
+        Cada palavra é buscada como prefixo, sem considerar acentos. Como os
+        resultados são ordenados por relevância, o cursor aqui é a posição do
+        primeiro resultado da página, conforme retornado em next_cursor.
+    """
+    q: str = "cach"
+
+
+class BuscaViewSchema(BaseModel):
+    """ Define como os resultados de uma busca serão retornados.
+    """
+    resultados: List[ItemViewSchema]
+    next_cursor: Optional[int] = None
+
+
+def apresenta_busca(resultados: list, next_cursor: Optional[int] = None):
+    """ Retorna uma representação dos resultados da busca, uma lista de
+        (nome_item, nome_tema), seguindo o schema definido em BuscaViewSchema.
+    """
+    return {
+        "resultados": [{"nome_tema": nome_tema, "nome_item": nome_item}
+                       for nome_item, nome_tema in resultados],
+        "next_cursor": next_cursor
+    }
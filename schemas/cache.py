@@ -0,0 +1,31 @@
+from pydantic import BaseModel
+
+from cache import CacheLRU
+
+
+class CacheEstatisticasSchema(BaseModel):
+    """ Define como as estatísticas de uso de um cache serão representadas
+    """
+    acertos: int = 0
+    falhas: int = 0
+    entradas: int = 0
+    bytes: int = 0
+
+
+class CacheViewSchema(BaseModel):
+    """ Define como as estatísticas dos caches de temas serão retornadas
+    """
+    temas: CacheEstatisticasSchema
+    ids_temas: CacheEstatisticasSchema
+    paginas: CacheEstatisticasSchema
+
+
+def apresenta_cache(cache_temas: CacheLRU, cache_ids_temas: CacheLRU, cache_paginas: CacheLRU):
+    """ Retorna uma representação dos caches seguindo o schema definido em
+        CacheViewSchema.
+    """
+    return {
+        "temas": cache_temas.estatisticas(),
+        "ids_temas": cache_ids_temas.estatisticas(),
+        "paginas": cache_paginas.estatisticas()
+    }
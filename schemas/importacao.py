@@ -0,0 +1,20 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+
+class ConflitoImportacaoSchema(BaseModel):
+    """ Define como um registro não importado por conflito será representado
+    """
+    registro: int = 0
+    nome_tema: str = "animais"
+    nome_item: Optional[str] = None
+    message: str
+
+
+class ImportacaoViewSchema(BaseModel):
+    """ Define como deve ser a estrutura do dado retornado após uma importação
+        em lote de temas e itens.
+    """
+    temas: int
+    itens: int
+    conflitos: List[ConflitoImportacaoSchema]
@@ -1,6 +1,8 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from typing import List
 from model.item import Item
-from model.tema import Tema
+
+from schemas.paginacao import PaginacaoSchema, LIMITE_MAXIMO
 
 
 class ItemSchema(BaseModel):
@@ -29,6 +31,21 @@ class ItensBuscaSchema(BaseModel):
     nome_tema: str = "animais"
 
 
+class ItensLoteSchema(BaseModel):
+    """ Define como deve ser a estrutura que representa vários itens de um tema
+        pelos nomes
+    """
+    nome_tema: str = "animais"
+    nomes: List[str] = Field(..., min_items=1, max_items=LIMITE_MAXIMO)
+
+
+class ItensListagemSchema(PaginacaoSchema):
+    """ Define como deve ser a estrutura que representa a listagem paginada
+        dos itens de um tema
+    """
+    nome_tema: str = "animais"
+
+
 class ItemBuscaSchema(BaseModel):
     """ Define como deve ser a estrutura que representa a busca pelo nome do item
     """
@@ -57,12 +74,22 @@ class ItensDelSchema(BaseModel):
     message: str
     quantidade: int
 
-def apresenta_item(item: Item, tema: Tema):
+
+class ItensLoteDelSchema(BaseModel):
+    """ Define como deve ser a estrutura do dado retornado após uma requisição
+        de remoção de vários itens de um tema pelos nomes.
+    """
+    message: str
+    quantidade: int
+    nao_encontrados: List[str] = []
+
+
+def apresenta_item(item: Item, nome_tema: str):
     """ Retorna uma representação do item seguindo o schema definido em
         ItemViewSchema.
     """
     return {
         
-        "nome_tema": tema.nome,
+        "nome_tema": nome_tema,
         "nome_item": item.nome
     }
\ No newline at end of file
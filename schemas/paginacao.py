@@ -0,0 +1,18 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+
+
+# quantidade de registros retornados por página quando não informada
+LIMITE_PADRAO = 100
+# maior quantidade de registros que pode ser solicitada em uma página
+LIMITE_MAXIMO = 1000
+
+
+class PaginacaoSchema(BaseModel):
+    """ Define os parâmetros de paginação por cursor (keyset) de uma listagem.
+
+        O cursor é o identificador do último registro da página anterior,
+        conforme retornado em next_cursor, e nunca é negativo.
+    """
+    limit: int = Field(LIMITE_PADRAO, ge=1, le=LIMITE_MAXIMO)
+    cursor: Optional[int] = Field(None, ge=0)
@@ -0,0 +1,33 @@
+from pydantic import BaseModel
+
+from model.pool import QueuePoolMonitorado
+
+
+class PoolViewSchema(BaseModel):
+    """ Define como as estatísticas do pool de conexões serão retornadas
+    """
+    tamanho: int = 5
+    conexoes_livres: int = 0
+    conexoes_em_uso: int = 0
+    overflow: int = 0
+    checkouts: int = 0
+    timeouts: int = 0
+    espera_total_segundos: float = 0.0
+    espera_maxima_segundos: float = 0.0
+
+
+def apresenta_pool(pool: QueuePoolMonitorado):
+    """ Retorna uma representação do pool seguindo o schema definido em
+        PoolViewSchema.
+    """
+    estatisticas = pool.estatisticas
+    return {
+        "tamanho": pool.size(),
+        "conexoes_livres": pool.checkedin(),
+        "conexoes_em_uso": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "checkouts": estatisticas.checkouts,
+        "timeouts": estatisticas.timeouts,
+        "espera_total_segundos": estatisticas.espera_total,
+        "espera_maxima_segundos": estatisticas.espera_maxima
+    }
@@ -1,8 +1,10 @@
-from pydantic import BaseModel
-from typing import List
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from model.item import Item
 from model.tema import Tema
 
 from schemas import ItemShortSchema
+from schemas.paginacao import PaginacaoSchema
 
 
 class TemaSchema(BaseModel):
@@ -24,25 +26,69 @@ class TemaBuscaSchema(BaseModel):
     nome: str = "animais"
 
 
+# quantidade máxima de temas buscados em uma única requisição de leitura em lote
+LIMITE_LOTE_TEMAS = 100
+
+
+class TemasLoteSchema(BaseModel):
+    """ Define como deve ser a estrutura que representa vários temas pelos
+        nomes (ex.: nomes=animais&nomes=livros)
+    """
+    nomes: List[str] = Field(..., min_items=1, max_items=LIMITE_LOTE_TEMAS)
+
+
+# quantidade máxima de itens de cada tema apresentados na listagem de temas;
+# os demais são obtidos pela listagem paginada de itens (GET /itens)
+LIMITE_ITENS_LISTAGEM = 20
+
+
+class TemasBuscaSchema(PaginacaoSchema):
+    """ Define como deve ser a estrutura que representa a listagem paginada
+        de temas; com resumo=true, cada tema traz apenas o nome e a
+        quantidade de itens
+    """
+    resumo: bool = False
+
+
 class ListagemTemasSchema(BaseModel):
-    """ Define como uma listagem de temas será retornada.
+    """ Define como uma listagem de temas será retornada: cada tema com nome,
+        total_itens e, fora do modo resumo, os primeiros itens (até
+        LIMITE_ITENS_LISTAGEM) e o cursor dos demais em GET /itens.
     """
     temas:List[TemaSchema]
+    next_cursor: Optional[int] = None
 
 
-def apresenta_temas(temas: List[Tema]):
+def apresenta_temas(temas: List[Tema], itens_temas: dict, next_cursor: Optional[int] = None):
     """ Retorna uma representação do tema seguindo o schema definido em
-        TemaViewSchema.
+        ListagemTemasSchema.
+
+    itens_temas associa a chave de cada tema aos seus primeiros itens, com um
+    item a mais quando há outros itens além dos apresentados.
     """
     result = []
     for tema in temas:
+        itens = itens_temas.get(tema.id, [])
+        next_cursor_itens = None
+        if len(itens) > LIMITE_ITENS_LISTAGEM:
+            itens = itens[:LIMITE_ITENS_LISTAGEM]
+            next_cursor_itens = itens[-1].id
         result.append({
             "nome": tema.nome,
-            "total_itens": len(tema.itens),
-            "itens": [{"nome": c.nome} for c in tema.itens]
+            "total_itens": tema.total_itens,
+            "itens": [{"nome": c.nome} for c in itens],
+            "next_cursor": next_cursor_itens
         })
 
-    return {"temas": result}
+    return {"temas": result, "next_cursor": next_cursor}
+
+
+def apresenta_resumo_temas(temas: List[Tema], next_cursor: Optional[int] = None):
+    """ Retorna uma representação resumida (nome e quantidade de itens) dos
+        temas seguindo o schema definido em ListagemTemasSchema.
+    """
+    result = [{"nome": tema.nome, "total_itens": tema.total_itens} for tema in temas]
+    return {"temas": result, "next_cursor": next_cursor}
 
 
 class TemaViewSchema(BaseModel):
@@ -51,6 +97,15 @@ class TemaViewSchema(BaseModel):
     nome: str = "animais"
     total_itens: int = 1
     itens:List[ItemShortSchema]
+    next_cursor: Optional[int] = None
+
+
+class TemasLoteViewSchema(BaseModel):
+    """ Define como os temas buscados em lote serão retornados: os temas
+        encontrados, na ordem pedida, e os nomes não encontrados.
+    """
+    temas: List[TemaViewSchema]
+    nao_encontrados: List[str] = []
 
 
 class TemaDelSchema(BaseModel):
@@ -67,12 +122,38 @@ class TemasDelSchema(BaseModel):
     message: str
     quantidade: int
 
+
+class TemasLoteDelSchema(BaseModel):
+    """ Define como deve ser a estrutura do dado retornado após uma requisição
+        de remoção de vários temas pelos nomes.
+    """
+    message: str
+    quantidade: int
+    quantidade_itens: int
+    nao_encontrados: List[str] = []
+
+
 def apresenta_tema(tema: Tema):
     """ Retorna uma representação do tema seguindo o schema definido em
         TemaViewSchema.
     """
+    itens = [{"nome": c.nome} for c in tema.itens]
     return {
         "nome": tema.nome,
-        "total_itens": len(tema.itens),
-        "itens": [{"nome": c.nome} for c in tema.itens]
-    }
\ No newline at end of file
+        "total_itens": len(itens),
+        "itens": itens,
+        "next_cursor": None
+    }
+
+
+def apresenta_pagina_itens(nome_tema: str, itens: List[Item], total_itens: int,
+                           next_cursor: Optional[int] = None):
+    """ Retorna uma representação de uma página dos itens de um tema seguindo
+        o schema definido em TemaViewSchema.
+    """
+    return {
+        "nome": nome_tema,
+        "total_itens": total_itens,
+        "itens": [{"nome": c.nome} for c in itens],
+        "next_cursor": next_cursor
+    }
@@ -0,0 +1,43 @@
+from flask import Response
+from flask.json import JSONEncoder
+import json
+
+# o orjson é opcional: sem ele, as respostas são serializadas pelo módulo json
+# da biblioteca padrão
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def codifica(valor) -> bytes:
+    """ Serializa o valor em JSON (UTF-8), pelo orjson quando disponível
+    """
+    if orjson is not None:
+        return orjson.dumps(valor, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(valor, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def resposta_json(corpo: bytes, status: int = 200):
+    """ Retorna uma resposta com um corpo JSON já serializado
+    """
+    return Response(corpo, status, mimetype="application/json")
+
+
+class CodificadorJSON(JSONEncoder):
+    """ Codificador usado pelo Flask para serializar os dicionários retornados
+        pelas rotas, pelo orjson quando disponível.
+
+        Os tipos não suportados pelo orjson são convertidos pelo método default
+        do codificador do Flask.
+    """
+
+    def encode(self, valor):
+        if orjson is None:
+            return super().encode(valor)
+        opcoes = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            opcoes |= orjson.OPT_SORT_KEYS
+        if self.indent:
+            opcoes |= orjson.OPT_INDENT_2
+        return orjson.dumps(valor, default=self.default, option=opcoes).decode()